@@ -0,0 +1,198 @@
+import hashlib
+import sqlite3
+from collections import OrderedDict
+import numpy as np
+import common as c
+
+digest_size = 16
+none = bytes(digest_size)
+
+def genome_hash(genome: np.ndarray) -> bytes:
+    h = hashlib.blake2b(digest_size=digest_size)
+    h.update(np.array(genome.shape, dtype='<i8').tobytes())
+    h.update(np.ascontiguousarray(genome, dtype=np.uint8).tobytes())
+    return h.digest()
+
+def row(columns: dict, i: int) -> list:
+    h, w = columns['shape'][i]
+    offset = columns['offset'][i]
+    genome = np.array(columns['genomes'][offset:offset + h * w], dtype=np.uint8).reshape(h, w)
+    return [int(columns['count'][i]), int(columns['first_cycle'][i]), columns['parent'][i].tobytes(), genome]
+
+class Archive:
+    def __init__(self, capacity: int = None):
+        self.entries = OrderedDict()
+        self.capacity = c.config['archive_capacity'] if capacity is None else capacity
+        self.connection = None
+        self.spilled = 0
+        self.packed = None
+        self.rows = None
+        self.cycle = 0
+
+    def __len__(self):
+        return len(self.entries) + self.spilled + self.pending()
+
+    def __getstate__(self):
+        self.load_spilled()
+        state = self.__dict__.copy()
+        state['connection'] = None
+        if self.packed is not None:
+            state['packed'] = {key: np.array(column) for key, column in self.packed.items()}
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault('packed', None)
+        state.setdefault('rows', None)
+        self.__dict__.update(state)
+
+    def add(self, memory, start: np.array, size: np.array, parent: bytes = None) -> bytes:
+        (y, x), (h, w) = start, size
+        genome = np.array(memory.memory_map[y:y + h, x:x + w], dtype=np.uint8)
+        key = genome_hash(genome)
+        entry = self.get(key)
+        if entry is None:
+            self.entries[key] = [1, self.cycle, parent or none, genome]
+            self.trim()
+        else:
+            entry[0] += 1
+        return key
+
+    def get(self, key: bytes):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+        if self.packed is not None:
+            entry = self.unpack_row(key)
+            if entry is not None:
+                return entry
+        if not self.spilled:
+            return None
+        row = self.database().execute(
+            'SELECT count, first_cycle, parent, height, width, genome FROM genomes WHERE hash = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self.database().execute('DELETE FROM genomes WHERE hash = ?', (key,))
+        self.spilled -= 1
+        count, first_cycle, parent, height, width, genome = row
+        entry = [count, first_cycle, parent, np.frombuffer(genome, dtype=np.uint8).reshape(height, width).copy()]
+        self.entries[key] = entry
+        self.trim()
+        return entry
+
+    def pending(self) -> int:
+        if self.packed is None:
+            return 0
+        return len(self.packed['count']) if self.rows is None else len(self.rows)
+
+    def unpack_row(self, key: bytes):
+        if self.rows is None:
+            hashes = np.ascontiguousarray(self.packed['hash']).tobytes()
+            self.rows = {hashes[i:i + digest_size]: i // digest_size for i in range(0, len(hashes), digest_size)}
+        i = self.rows.pop(key, None)
+        if i is None:
+            return None
+        entry = row(self.packed, i)
+        if not self.rows:
+            self.packed = None
+            self.rows = None
+        self.entries[key] = entry
+        self.trim()
+        return entry
+
+    def genome(self, key: bytes):
+        entry = self.get(key)
+        return None if entry is None else c.decode(entry[3])
+
+    def lineage(self, key: bytes) -> list:
+        keys = []
+        while key != none and key not in keys:
+            entry = self.get(key)
+            if entry is None:
+                break
+            keys.append(key)
+            key = entry[2]
+        return keys
+
+    def database(self):
+        if self.connection is None:
+            self.connection = sqlite3.connect('')
+            self.connection.execute(
+                'CREATE TABLE genomes (hash BLOB PRIMARY KEY, count INTEGER, first_cycle INTEGER, '
+                'parent BLOB, height INTEGER, width INTEGER, genome BLOB)')
+        return self.connection
+
+    def trim(self):
+        if not self.capacity or len(self.entries) <= self.capacity:
+            return
+        rows = []
+        while len(self.entries) > self.capacity * 3 // 4:
+            key, (count, first_cycle, parent, genome) = self.entries.popitem(last=False)
+            rows.append((key, count, first_cycle, parent, genome.shape[0], genome.shape[1], genome.tobytes()))
+        self.database().executemany('INSERT INTO genomes VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        self.database().commit()
+        self.spilled += len(rows)
+
+    def load_spilled(self):
+        if not self.spilled:
+            return
+        rows = self.database().execute(
+            'SELECT hash, count, first_cycle, parent, height, width, genome FROM genomes').fetchall()
+        for key, count, first_cycle, parent, height, width, genome in rows:
+            self.entries[key] = [count, first_cycle, parent,
+                                 np.frombuffer(genome, dtype=np.uint8).reshape(height, width).copy()]
+            self.entries.move_to_end(key, last=False)
+        self.database().execute('DELETE FROM genomes')
+        self.database().commit()
+        self.spilled = 0
+
+    def pack(self) -> dict:
+        rows = [(key, entry) for key, entry in self.entries.items()]
+        if self.packed is not None:
+            hashes = self.packed['hash']
+            for i in (range(len(hashes)) if self.rows is None else self.rows.values()):
+                rows.append((hashes[i].tobytes(), row(self.packed, i)))
+        if self.spilled:
+            for key, count, first_cycle, parent, height, width, genome in self.database().execute(
+                    'SELECT hash, count, first_cycle, parent, height, width, genome FROM genomes'):
+                rows.append((key, [count, first_cycle, parent,
+                                   np.frombuffer(genome, dtype=np.uint8).reshape(height, width)]))
+        count = len(rows)
+        shapes = np.array([entry[3].shape for _, entry in rows], dtype=np.int64).reshape(count, 2)
+        sizes = shapes.prod(axis=1)
+        return {
+            'hash': np.frombuffer(b''.join(key for key, _ in rows), dtype=np.uint8).reshape(count, digest_size),
+            'parent': np.frombuffer(b''.join(entry[2] for _, entry in rows), dtype=np.uint8).reshape(count, digest_size),
+            'count': np.array([entry[0] for _, entry in rows], dtype=np.int64),
+            'first_cycle': np.array([entry[1] for _, entry in rows], dtype=np.int64),
+            'shape': shapes,
+            'offset': np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64) if count else np.zeros(0, dtype=np.int64),
+            'genomes': np.concatenate([entry[3].ravel() for _, entry in rows]) if count else np.zeros(0, dtype=np.uint8)}
+
+    def merge(self, columns: dict):
+        for i in range(len(columns['count'])):
+            key = columns['hash'][i].tobytes()
+            count = int(columns['count'][i])
+            first_cycle = int(columns['first_cycle'][i])
+            entry = self.get(key)
+            if entry is None:
+                self.entries[key] = row(columns, i)
+                self.trim()
+            else:
+                entry[0] += count
+                if first_cycle < entry[1]:
+                    entry[1] = first_cycle
+                    entry[2] = columns['parent'][i].tobytes()
+
+    def attach(self, columns: dict):
+        if self.entries or self.spilled or self.packed is not None:
+            self.merge(columns)
+        elif len(columns['count']):
+            self.packed = columns
+
+    def drain(self) -> dict:
+        columns = self.pack()
+        self.entries = OrderedDict()
+        self.packed = None
+        self.rows = None
+        return columns
@@ -0,0 +1,271 @@
+import time
+import numpy as np
+import common as c
+import memory as m
+import queue as q
+import organism as o
+
+steps = 5000
+repeats = 5
+excluded = ('allocate_child', 'split_child')
+
+class RegsDict(dict):
+    allowed_keys = ['a', 'b', 'c', 'd']
+
+    def __setitem__(self, key, value):
+        if key not in self.allowed_keys:
+            raise ValueError
+        super().__setitem__(key, value)
+
+class LegacyOrganism:
+    def __init__(self, organism):
+        self.ip = np.copy(organism.ip)
+        self.delta = np.copy(organism.delta)
+        self.size = np.copy(organism.size)
+        self.start = np.copy(organism.start)
+        self.regs = RegsDict({
+            'a': np.array([0, 0]),
+            'b': np.array([0, 0]),
+            'c': np.array([0, 0]),
+            'd': np.array([0, 0]),})
+        self.stack = []
+        self.errors = 0
+        self.child_size = np.array([0, 0])
+        self.child_start = np.array([0, 0])
+        self.mods = {'x': 0, 'y': 1}
+
+    def no_operation(self):
+        pass
+
+    def move_up(self):
+        self.delta = c.deltas['up']
+
+    def move_down(self):
+        self.delta = c.deltas['down']
+
+    def move_right(self):
+        self.delta = c.deltas['right']
+
+    def move_left(self):
+        self.delta = c.deltas['left']
+
+    def ip_offset(self, offset: int = 0) -> np.array:
+        return self.ip + offset * self.delta
+
+    def inst(self, offset: int = 0) -> str:
+        return c.instruction_chars[m.memory.inst(self.ip_offset(offset))]
+
+    def find_template(self):
+        try:
+            register = self.inst(1)
+            if register not in self.regs:
+                return
+            template = []
+            max_size = min(max(self.size), 100)  
+            for i in range(2, max_size):
+                inst_char = self.inst(i)
+                if inst_char in ['.', ':']:
+                    template.append(':' if inst_char == '.' else '.')
+                else:
+                    break
+            if not template:
+                return
+            counter = 0
+            for i in range(i, max_size):
+                if self.inst(i) == template[counter]:
+                    counter += 1
+                else:
+                    counter = 0
+                if counter == len(template):
+                    self.regs[register] = self.ip + i * self.delta
+                    break
+        except:
+            pass
+
+    def if_not_zero(self):
+        try:
+            if self.inst(1) in self.mods.keys():
+                reg_name = self.inst(2)
+                if reg_name in self.regs:
+                    value = self.regs[reg_name][self.mods[self.inst(1)]]
+                    start_from = 1
+                else:
+                    return
+            else:
+                reg_name = self.inst(1)
+                if reg_name in self.regs:
+                    value = self.regs[reg_name]
+                    start_from = 0
+                else:
+                    return
+            if not np.any(value):
+                self.ip = self.ip_offset(start_from + 1)
+            else:
+                self.ip = self.ip_offset(start_from + 2)
+        except:
+            pass
+
+    def increment(self):
+        try:
+            if self.inst(1) in self.mods.keys():
+                reg_name = self.inst(2)
+                if reg_name in self.regs:
+                    self.regs[reg_name][self.mods[self.inst(1)]] += 1
+            else:
+                reg_name = self.inst(1)
+                if reg_name in self.regs:
+                    self.regs[reg_name] += 1
+        except:
+            pass
+
+    def decrement(self):
+        try:
+            if self.inst(1) in self.mods.keys():
+                reg_name = self.inst(2)
+                if reg_name in self.regs:
+                    self.regs[reg_name][self.mods[self.inst(1)]] -= 1
+            else:
+                reg_name = self.inst(1)
+                if reg_name in self.regs:
+                    self.regs[reg_name] -= 1
+        except:
+            pass
+
+    def zero(self):
+        try:
+            reg_name = self.inst(1)
+            if reg_name in self.regs:
+                self.regs[reg_name] = np.array([0, 0])
+        except:
+            pass
+
+    def one(self):
+        try:
+            reg_name = self.inst(1)
+            if reg_name in self.regs:
+                self.regs[reg_name] = np.array([1, 1])
+        except:
+            pass
+
+    def subtract(self):
+        try:
+            reg1 = self.inst(1)
+            reg2 = self.inst(2)
+            reg3 = self.inst(3)
+            if all(reg in self.regs for reg in [reg1, reg2, reg3]):
+                self.regs[reg3] = self.regs[reg1] - self.regs[reg2]
+        except:
+            pass
+
+    def load_inst(self):
+        try:
+            reg1 = self.inst(1)
+            reg2 = self.inst(2)
+            if reg1 in self.regs and reg2 in self.regs:
+                self.regs[reg2] = np.copy(c.instruction_values[m.memory.inst(self.regs[reg1])])
+        except:
+            pass
+
+    def write_inst(self):
+        try:
+            if not np.array_equal(self.child_size, np.array([0, 0])):
+                reg1 = self.inst(1)
+                reg2 = self.inst(2)
+                if reg1 in self.regs and reg2 in self.regs:
+                    m.memory.write_inst(self.regs[reg1], self.regs[reg2])
+        except:
+            pass
+
+    def push(self):
+        try:
+            if len(self.stack) < c.config['stack_length']:
+                reg_name = self.inst(1)
+                if reg_name in self.regs:
+                    self.stack.append(np.copy(self.regs[reg_name]))
+        except:
+            pass
+
+    def pop(self):
+        try:
+            if self.stack:
+                reg_name = self.inst(1)
+                if reg_name in self.regs:
+                    self.regs[reg_name] = np.copy(self.stack.pop())
+        except:
+            pass
+
+    def cycle(self):
+        try:
+            method_name = c.instruction_handlers[m.memory.inst(self.ip)]
+            if hasattr(self, method_name):
+                getattr(self, method_name)()
+            if (c.config['penalize_parasitism'] and 
+                not m.memory.is_allocated(self.ip) and
+                max(np.abs(self.ip - self.start)) > c.config['penalize_parasitism']):
+                raise ValueError("Parasitism penalty")
+        except Exception:
+            self.errors += 1
+
+def legacy_resolve(organism, opcode):
+    method_name = c.instruction_handlers[opcode]
+    if hasattr(organism, method_name):
+        return getattr(organism, method_name)
+
+def table_resolve(organism, opcode):
+    return organism.dispatch[opcode]
+
+def legacy_cycle(organism):
+    organism.cycle()
+
+def table_cycle(organism):
+    if organism.dispatch[m.memory.inst(organism.ip)](organism) or organism.is_parasitic():
+        organism.errors += 1
+
+def seed_memory(handlers):
+    np.random.seed(c.config['random_seed'])
+    allowed = [opcode for opcode, name in enumerate(c.instruction_handlers) if name in handlers]
+    memory_map = np.random.choice(allowed, size=c.config['memory_size']).astype(np.uint8)
+    m.memory = m.Memory(memory_map=memory_map)
+
+def measure(function, organism, opcodes):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for opcode in opcodes:
+            function(organism, opcode)
+        best = min(best, time.perf_counter() - start)
+    return best / len(opcodes)
+
+def measure_cycle(function, organism):
+    ip, delta = np.copy(organism.ip), np.copy(organism.delta)
+    best = float('inf')
+    for _ in range(repeats):
+        organism.ip, organism.delta = np.copy(ip), np.copy(delta)
+        start = time.perf_counter()
+        for _ in range(steps):
+            function(organism)
+            organism.ip = (organism.ip + organism.delta) % c.config['memory_size']
+        best = min(best, time.perf_counter() - start)
+    return best / steps
+
+def main():
+    m.memory = m.Memory()
+    q.queue = q.Queue()
+    organism = o.Organism(c.config['memory_size'] // 2, np.array([8, 8]))
+    legacy = LegacyOrganism(organism)
+    opcodes = np.random.randint(len(c.instruction_chars), size=steps).tolist()
+    results = [
+        ('resolve (legacy)', measure(legacy_resolve, legacy, opcodes)),
+        ('resolve (table)', measure(table_resolve, organism, opcodes))]
+    scenarios = [
+        ('no-op', ['no_operation']),
+        ('mixed', [name for name in c.instruction_handlers if name not in excluded])]
+    for scenario, handlers in scenarios:
+        seed_memory(handlers)
+        results.append(('{} step (legacy)'.format(scenario), measure_cycle(legacy_cycle, legacy)))
+        results.append(('{} step (table)'.format(scenario), measure_cycle(table_cycle, organism)))
+    for name, seconds in results:
+        print('{:<24}: {:9.1f} ns/instruction'.format(name, seconds * 1e9))
+
+if __name__ == '__main__':
+    main()
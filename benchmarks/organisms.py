@@ -0,0 +1,77 @@
+import argparse
+import json
+import time
+import tracemalloc
+import numpy as np
+
+def build(count, seed):
+    import common as c
+    import memory as m
+    import queue as q
+    import organism as o
+    c.config = c.load_config({'kill_if_no_child': 1000000000, 'organism_death_rate': 1000000000})
+    m.memory = m.Memory()
+    q.queue = q.Queue()
+    rng = np.random.RandomState(seed)
+    chars = list(c.instructions.keys())
+    weights = rng.uniform(0.5, 1.5, len(chars))
+    weights[chars.index('.')] = 4
+    m.memory.memory_map[...] = c.encode(rng.choice(chars, size=tuple(c.config['memory_size']), p=weights / weights.sum()))
+    max_y, max_x = c.config['memory_size']
+    side = int(np.ceil(np.sqrt(count)))
+    step = min(max_y, max_x) // side
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        o.Organism(np.array([i // side * step, i % side * step]), np.array([2, 2]))
+    created = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    for organism in q.queue.organisms:
+        organism.delta = c.deltas[rng.choice(list(c.deltas))]
+        for reg in organism.regs:
+            organism.regs[reg] = rng.randint(-1, 5, 2)
+    return created / count
+
+def step(cycles):
+    import queue as q
+    steps = 0
+    start = time.perf_counter()
+    for _ in range(cycles):
+        steps += len(q.queue)
+        q.queue.cycle_all()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    counted = len(q.queue)
+    q.queue.cycle_all()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return elapsed / steps * 1e9, peak / max(counted, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-organism memory and step cost of the object engine')
+    parser.add_argument('--organisms', type=int, default=1000, help='Organisms to create')
+    parser.add_argument('--cycles', type=int, default=200, help='Cycles to time')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the world')
+    parser.add_argument('--untraced', action='store_true', help='Decode every instruction instead of using the trace cache')
+    parser.add_argument('--out', default=None, help='Optional JSON result file')
+    args = parser.parse_args()
+    import organism as o
+    o.Organism.is_traced = not args.untraced
+    bytes_per_organism = build(args.organisms, args.seed)
+    ns_per_step, transient_bytes = step(args.cycles)
+    results = {
+        'organisms': args.organisms,
+        'traced': not args.untraced,
+        'bytes_per_organism': bytes_per_organism,
+        'ns_per_organism_step': ns_per_step,
+        'transient_bytes_per_step': transient_bytes}
+    for key, value in results.items():
+        print('{:<26}: {:.1f}'.format(key, value))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import time
+import numpy as np
+import common as c
+import queue as q
+import purge
+
+sizes = (1000, 10000, 100000)
+repeats = 3
+
+class Stub:
+    def __init__(self, errors, size, child_size, reproduction_cycle):
+        self.errors = errors
+        self.size = size
+        self.child_size = child_size
+        self.reproduction_cycle = reproduction_cycle
+        self.organism_id = -1
+
+    def __lt__(self, other):
+        return self.errors < other.errors
+
+    def kill(self):
+        pass
+
+def population(count):
+    np.random.seed(c.config['random_seed'])
+    errors = np.random.randint(0, c.config['organism_death_rate'], count).tolist()
+    sizes = np.random.randint(1, 20, (count, 2))
+    cycles = np.random.randint(0, c.config['kill_if_no_child'], count).tolist()
+    return [Stub(errors[i], sizes[i], np.zeros(2, dtype=int), cycles[i]) for i in range(count)]
+
+def legacy_kill(queue):
+    sorted_organisms = sorted(queue.organisms, reverse=True)
+    ratio = max(1, int(len(queue.organisms) * c.config['kill_organisms_ratio']))
+    for organism in sorted_organisms[:ratio]:
+        organism.kill()
+    queue.organisms = sorted_organisms[ratio:]
+
+def policy_kill(policy):
+    def kill(queue):
+        c.config['kill_policy'] = policy
+        queue.kill_organisms()
+    return kill
+
+def measure(kill, organisms):
+    best = float('inf')
+    for _ in range(repeats):
+        queue = q.Queue()
+        queue.organisms = list(organisms)
+        start = time.perf_counter()
+        kill(queue)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    methods = [('legacy sort', legacy_kill)] + [(policy, policy_kill(policy)) for policy in purge.policies]
+    print('{:<12}'.format('organisms') + ''.join('{:>14}'.format(name) for name, _ in methods))
+    for count in sizes:
+        organisms = population(count)
+        timings = [measure(kill, organisms) for _, kill in methods]
+        print('{:<12}'.format(count) + ''.join('{:>11.2f} ms'.format(t * 1e3) for t in timings))
+
+if __name__ == '__main__':
+    main()
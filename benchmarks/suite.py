@@ -0,0 +1,225 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+scenarios = {
+    'default': {'cycles': 2000, 'overrides': {}},
+    'crowded': {'cycles': 300, 'overrides': {}, 'fill': 0.6},
+    'large': {'cycles': 300, 'overrides': {'memory_size': [512, 512]}, 'copies': 64},
+    'purge': {'cycles': 300, 'overrides': {'memory_full_ratio': 0.3}, 'fill': 0.4}}
+
+def machine_info() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'commit': commit,
+        'date': datetime.datetime.now().isoformat(timespec='seconds')}
+
+def populate(rng, fill):
+    import common as c
+    import memory as m
+    import organism as o
+    chars = list(c.instructions.keys())
+    weights = rng.uniform(0.5, 1.5, len(chars))
+    weights[chars.index('.')] = 4
+    m.memory.memory_map[...] = c.encode(rng.choice(chars, size=tuple(c.config['memory_size']), p=weights / weights.sum()))
+    max_y, max_x = c.config['memory_size']
+    while m.memory.used / m.memory.allocation_map.size < fill:
+        address = np.array([rng.randint(0, max_y - 8), rng.randint(0, max_x - 8)])
+        size = rng.randint(2, 8, 2)
+        if m.memory.is_allocated_region(address, size) is False:
+            organism = o.Organism(address, size)
+            organism.delta = c.deltas[rng.choice(list(c.deltas))]
+            for reg in organism.regs:
+                organism.regs[reg] = rng.randint(-1, 5, 2)
+
+def replicate(genome_size, copies):
+    import common as c
+    import memory as m
+    import organism as o
+    center = c.config['memory_size'] // 2
+    genome = m.memory.memory_map[center[0]:center[0] + genome_size[0], center[1]:center[1] + genome_size[1]]
+    genome = c.decode(genome)
+    side = int(np.ceil(np.sqrt(copies)))
+    step = c.config['memory_size'] // side
+    for i in range(copies):
+        address = np.array([i // side, i % side]) * step
+        if m.memory.is_allocated_region(address, np.array(genome_size)) is False:
+            m.memory.load_genome(genome, address, genome_size)
+            o.Organism(address, genome_size)
+
+def build(name, engine):
+    import queue as q
+    from simulation import Simulation
+    scenario = scenarios[name]
+    simulation = Simulation(dict(scenario['overrides'], headless=True, engine=engine))
+    rng = np.random.RandomState(simulation.config['random_seed'])
+    if 'fill' in scenario:
+        populate(rng, scenario['fill'])
+    if 'copies' in scenario:
+        replicate(tuple(q.queue.organisms[0].size), scenario['copies'])
+    simulation.attach_engine()
+    return simulation
+
+def best(measure, repeats):
+    return min(measure() for _ in range(repeats))
+
+def run_cycles(simulation, cycles):
+    import queue as q
+    steps = 0
+    start = time.perf_counter()
+    for _ in range(cycles):
+        if not len(q.queue):
+            break
+        steps += len(q.queue)
+        q.queue.cycle_all()
+        simulation.make_cycle()
+    elapsed = time.perf_counter() - start
+    return simulation.cycle / elapsed, steps / elapsed
+
+def time_purge(name, engine):
+    import queue as q
+    with build(name, engine):
+        q.queue.sync()
+        start = time.perf_counter()
+        q.queue.kill_organisms()
+        return (time.perf_counter() - start) * 1000
+
+def time_snapshot(simulation, directory):
+    import memory as m
+    import queue as q
+    import snapshot
+    filename = os.path.join(directory, 'benchmark.snapshot')
+    start = time.perf_counter()
+    snapshot.save(filename, simulation.cycle, simulation.purges, m.memory, q.queue)
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    snapshot.load(filename)
+    return saved * 1000, (time.perf_counter() - start) * 1000
+
+def time_frames(repeats):
+    import common as c
+    import memory as m
+    import queue as q
+    try:
+        from pygame_visualizer import PygameVisualizer
+    except ImportError:
+        return None, None
+    visualizer = PygameVisualizer(m.memory, q.queue, c.config)
+
+    def full():
+        visualizer.view_key = None
+        start = time.perf_counter()
+        visualizer.draw_memory()
+        return (time.perf_counter() - start) * 1000
+
+    def incremental():
+        q.queue.cycle_all()
+        start = time.perf_counter()
+        visualizer.draw_memory()
+        return (time.perf_counter() - start) * 1000
+
+    return best(full, repeats), best(incremental, repeats)
+
+def run(args):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    names = args.scenarios or list(scenarios)
+    results = {}
+    directory = tempfile.mkdtemp(prefix='fungera-benchmark-')
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        for name in names:
+            cycles = args.cycles or scenarios[name]['cycles']
+            runs = []
+            for _ in range(args.repeats - 1):
+                with build(name, args.engine) as simulation:
+                    runs.append(run_cycles(simulation, cycles))
+            with build(name, args.engine) as simulation:
+                runs.append(run_cycles(simulation, cycles))
+                snapshots = [time_snapshot(simulation, directory) for _ in range(args.repeats)]
+                frame_full, frame_incremental = time_frames(args.repeats)
+            results[name] = {
+                'cycles': simulation.cycle,
+                'cycles_per_second': max(result[0] for result in runs),
+                'organism_steps_per_second': max(result[1] for result in runs),
+                'purge_ms': best(lambda: time_purge(name, args.engine), args.repeats),
+                'snapshot_save_ms': min(saved for saved, _ in snapshots),
+                'snapshot_load_ms': min(loaded for _, loaded in snapshots),
+                'frame_full_ms': frame_full,
+                'frame_incremental_ms': frame_incremental}
+            print('{:<8} {}'.format(name, ', '.join('{}={:.4g}'.format(key, value)
+                                                      for key, value in results[name].items() if value is not None)))
+    finally:
+        os.chdir(cwd)
+    report = {
+        'machine': machine_info(),
+        'settings': {'engine': args.engine, 'repeats': args.repeats, 'cycles': args.cycles},
+        'results': results}
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print('Results written to {}'.format(args.out))
+
+def is_better_higher(metric: str) -> bool:
+    return metric.endswith('_per_second')
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    regressions = 0
+    for name, metrics in candidate['results'].items():
+        for metric, value in metrics.items():
+            old = baseline['results'].get(name, {}).get(metric)
+            if metric == 'cycles' or old is None or value is None or not old:
+                continue
+            change = value / old - 1
+            worse = -change if is_better_higher(metric) else change
+            flag = 'REGRESSION' if worse > args.threshold else ''
+            regressions += bool(flag)
+            print('{:<8} {:<26} {:>12.4g} {:>12.4g} {:>+8.1%} {}'.format(name, metric, old, value, change, flag))
+    machine = ('platform', 'processor', 'cpu_count', 'python', 'numpy')
+    if any(baseline['machine'].get(key) != candidate['machine'].get(key) for key in machine):
+        print('Note: results come from different machines')
+    if baseline['settings'] != candidate['settings']:
+        print('Note: results use different settings {} vs {}'.format(baseline['settings'], candidate['settings']))
+    print('{} regression(s) beyond {:.0%}'.format(regressions, args.threshold))
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Fungera throughput benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+    runner = commands.add_parser('run', help='Run the benchmark scenarios')
+    runner.add_argument('--out', default='benchmark.json', help='Result file')
+    runner.add_argument('--engine', default='object', choices=['object', 'vector'], help='Execution engine')
+    runner.add_argument('--repeats', type=int, default=3, help='Best-of repeats for each measurement')
+    runner.add_argument('--cycles', type=int, default=None, help='Cycles per scenario (default per scenario)')
+    runner.add_argument('--scenarios', nargs='*', choices=list(scenarios), help='Scenarios to run (default all)')
+    comparer = commands.add_parser('compare', help='Compare two result files')
+    comparer.add_argument('baseline')
+    comparer.add_argument('candidate')
+    comparer.add_argument('--threshold', type=float, default=0.1, help='Relative slowdown reported as a regression')
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+if __name__ == '__main__':
+    main()
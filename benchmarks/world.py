@@ -0,0 +1,71 @@
+import argparse
+import json
+import resource
+import time
+import numpy as np
+
+def resident_bytes() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+def populate(copies, seed):
+    import common as c
+    import memory as m
+    import queue as q
+    import organism as o
+    rng = np.random.RandomState(seed)
+    chars = list(c.instructions.keys())
+    weights = rng.uniform(0.5, 1.5, len(chars))
+    weights[chars.index('.')] = 4
+    side = int(np.ceil(np.sqrt(copies)))
+    center = c.config['memory_size'] // 2
+    for i in range(copies):
+        address = center + np.array([i // side, i % side]) * 12
+        genome = rng.choice(chars, size=(8, 8), p=weights / weights.sum())
+        m.memory.load_genome(genome, address, genome.shape)
+        o.Organism(address, np.array(genome.shape))
+    return len(q.queue)
+
+def map_bytes(memory) -> int:
+    import chunks
+    return sum(grid.resident if chunks.is_chunked(grid) else grid.nbytes
+               for grid in (memory.memory_map, memory.allocation_map))
+
+def main():
+    parser = argparse.ArgumentParser(description='Resident memory of a sparsely populated large world')
+    parser.add_argument('--size', type=int, default=4096, help='World height and width')
+    parser.add_argument('--backend', default='chunked', choices=['dense', 'chunked'], help='Memory backend')
+    parser.add_argument('--memory-dir', default=None, help='Back chunks with memory-mapped scratch files here')
+    parser.add_argument('--copies', type=int, default=256, help='Organisms placed around the centre')
+    parser.add_argument('--cycles', type=int, default=200, help='Cycles to run')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--out', default=None, help='Optional JSON result file')
+    args = parser.parse_args()
+    import common as c
+    import memory as m
+    import queue as q
+    c.config = c.load_config({'memory_backend': args.backend, 'memory_directory': args.memory_dir,
+                              'memory_size': [args.size, args.size]})
+    before = resident_bytes()
+    m.memory = m.Memory()
+    q.queue = q.Queue()
+    organisms = populate(args.copies, args.seed)
+    start = time.perf_counter()
+    for _ in range(args.cycles):
+        q.queue.cycle_all()
+    elapsed = time.perf_counter() - start
+    results = {
+        'size': args.size,
+        'organisms': organisms,
+        'map_mb': map_bytes(m.memory) / 2 ** 20,
+        'resident_mb': (resident_bytes() - before) / 2 ** 20,
+        'cycles_per_second': args.cycles / elapsed}
+    print('{:<18}: {}'.format('backend', args.backend))
+    for key, value in results.items():
+        print('{:<18}: {:.1f}'.format(key, value))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(dict(results, backend=args.backend), f, indent=2)
+
+if __name__ == '__main__':
+    main()
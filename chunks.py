@@ -0,0 +1,190 @@
+import tempfile
+import numpy as np
+
+class ChunkedGrid:
+    ndim = 2
+
+    def __init__(self, shape, dtype, fill=0, chunk=64, directory=None):
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.dtype = np.dtype(dtype)
+        self.fill = fill
+        self.chunk = chunk
+        self.file = None if directory is None else tempfile.TemporaryFile(dir=directory)
+        self.table = np.full((-(-self.shape[0] // chunk), -(-self.shape[1] // chunk)), -1, dtype=np.int64)
+        self.count = 0
+        self.data = self.storage(16)
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def resident(self):
+        return self.count * self.chunk * self.chunk * self.dtype.itemsize + self.table.nbytes
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['data'] = np.array(self.data[:self.count])
+        state['file'] = None
+        return state
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self[:, :]
+        return dense if dtype is None else dense.astype(dtype)
+
+    def storage(self, capacity: int):
+        shape = (capacity, self.chunk, self.chunk)
+        if self.file is None:
+            data = np.empty(shape, dtype=self.dtype)
+            if self.count:
+                data[:self.count] = self.data[:self.count]
+            return data
+        if self.count:
+            self.data.flush()
+        self.file.truncate(capacity * self.chunk * self.chunk * self.dtype.itemsize)
+        return np.memmap(self.file, dtype=self.dtype, mode='r+', shape=shape)
+
+    def slot(self, cy: int, cx: int) -> int:
+        k = self.table.item(cy, cx)
+        if k < 0:
+            if self.count == len(self.data):
+                self.data = self.storage(2 * len(self.data))
+            k = self.count
+            self.count += 1
+            self.data[k] = self.fill
+            self.table[cy, cx] = k
+        return k
+
+    def item(self, y: int, x: int):
+        ch = self.chunk
+        k = self.table.item(y // ch, x // ch)
+        return self.fill if k < 0 else self.data.item(k, y % ch, x % ch)
+
+    def bounds(self, key):
+        if key is Ellipsis:
+            key = (slice(None), slice(None))
+        elif not isinstance(key, tuple):
+            key = (key, slice(None))
+        rows, cols = key
+        spans = []
+        for index, length in ((rows, self.shape[0]), (cols, self.shape[1])):
+            if isinstance(index, slice):
+                start, stop, step = index.indices(length)
+                if step != 1:
+                    raise IndexError('chunked grids only support contiguous slices')
+                spans.append((start, max(start, stop), False))
+            else:
+                index = int(index)
+                if index < 0:
+                    index += length
+                if not 0 <= index < length:
+                    raise IndexError('index {} is out of bounds for size {}'.format(index, length))
+                spans.append((index, index + 1, True))
+        return spans
+
+    def overlaps(self, y0: int, y1: int, x0: int, x1: int):
+        ch = self.chunk
+        for cy in range(y0 // ch, (y1 - 1) // ch + 1):
+            for cx in range(x0 // ch, (x1 - 1) // ch + 1):
+                ya, yb = max(y0, cy * ch), min(y1, (cy + 1) * ch)
+                xa, xb = max(x0, cx * ch), min(x1, (cx + 1) * ch)
+                yield cy, cx, (slice(ya - y0, yb - y0), slice(xa - x0, xb - x0)), \
+                    (slice(ya - cy * ch, yb - cy * ch), slice(xa - cx * ch, xb - cx * ch))
+
+    def is_fancy(self, key) -> bool:
+        return isinstance(key, tuple) and any(isinstance(index, (np.ndarray, list)) for index in key)
+
+    def __getitem__(self, key):
+        if self.is_fancy(key):
+            ys, xs = np.broadcast_arrays(np.asarray(key[0]), np.asarray(key[1]))
+            ch = self.chunk
+            k = self.table[ys // ch, xs // ch]
+            out = np.full(ys.shape, self.fill, dtype=self.dtype)
+            present = k >= 0
+            out[present] = self.data[k[present], ys[present] % ch, xs[present] % ch]
+            return out
+        (y0, y1, is_row), (x0, x1, is_col) = self.bounds(key)
+        if is_row and is_col:
+            return self.dtype.type(self.item(y0, x0))
+        out = np.full((y1 - y0, x1 - x0), self.fill, dtype=self.dtype)
+        if y1 > y0 and x1 > x0:
+            for cy, cx, target, source in self.overlaps(y0, y1, x0, x1):
+                k = self.table.item(cy, cx)
+                if k >= 0:
+                    out[target] = self.data[k][source]
+        if is_row:
+            return out[0]
+        return out[:, 0] if is_col else out
+
+    def __setitem__(self, key, value):
+        if self.is_fancy(key):
+            ys, xs = np.broadcast_arrays(np.asarray(key[0]), np.asarray(key[1]))
+            values = np.broadcast_to(np.asarray(value, dtype=self.dtype), ys.shape)
+            ch = self.chunk
+            k = self.table[ys // ch, xs // ch]
+            missing = (k < 0) & (values != self.fill)
+            if missing.any():
+                for cy, cx in set(zip((ys[missing] // ch).tolist(), (xs[missing] // ch).tolist())):
+                    self.slot(cy, cx)
+                k = self.table[ys // ch, xs // ch]
+            present = k >= 0
+            self.data[k[present], ys[present] % ch, xs[present] % ch] = values[present]
+            return
+        (y0, y1, _), (x0, x1, _) = self.bounds(key)
+        if y1 <= y0 or x1 <= x0:
+            return
+        values = np.broadcast_to(np.asarray(value, dtype=self.dtype), (y1 - y0, x1 - x0))
+        for cy, cx, target, source in self.overlaps(y0, y1, x0, x1):
+            block = values[target]
+            if self.table.item(cy, cx) < 0 and not (block != self.fill).any():
+                continue
+            k = self.slot(cy, cx)
+            self.data[k][source] = block
+
+    def any(self, y0: int, x0: int, y1: int, x1: int) -> bool:
+        for cy, cx, _, source in self.overlaps(y0, y1, x0, x1):
+            k = self.table.item(cy, cx)
+            if (self.fill if k < 0 else self.data[k][source].any()):
+                return True
+        return False
+
+    def regions(self):
+        ch = self.chunk
+        for cy, cx in zip(*np.nonzero(self.table >= 0)):
+            y0, x0 = int(cy) * ch, int(cx) * ch
+            yield y0, x0, min(y0 + ch, self.shape[0]), min(x0 + ch, self.shape[1])
+
+    def count_nonzero(self) -> int:
+        padding = self.size - self.count * self.chunk * self.chunk
+        return int(np.count_nonzero(self.data[:self.count])) + (padding if self.fill else 0)
+
+    def bincount(self, minlength: int = 0) -> np.ndarray:
+        counts = np.bincount(np.ravel(self.data[:self.count]), minlength=max(minlength, int(self.fill) + 1))
+        counts[self.fill] += self.size - self.count * self.chunk * self.chunk
+        return counts
+
+    def pack(self) -> dict:
+        return {
+            'shape': np.array(self.shape, dtype=np.int64),
+            'fill': np.array([self.fill], dtype=self.dtype),
+            'table': self.table.copy(),
+            'data': np.array(self.data[:self.count])}
+
+    @classmethod
+    def unpack(cls, columns: dict, directory=None):
+        data = columns['data']
+        grid = cls(columns['shape'], data.dtype, columns['fill'][0].item(), data.shape[1], directory)
+        grid.table = np.array(columns['table'])
+        grid.data = grid.storage(max(16, len(data)))
+        grid.data[:len(data)] = data
+        grid.count = len(data)
+        return grid
+
+def is_chunked(array) -> bool:
+    return isinstance(array, ChunkedGrid)
+
+def count_nonzero(array) -> int:
+    return array.count_nonzero() if is_chunked(array) else int(np.count_nonzero(array))
+
+def bincount(array, minlength: int = 0) -> np.ndarray:
+    return array.bincount(minlength) if is_chunked(array) else np.bincount(np.ravel(array), minlength=minlength)
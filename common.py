@@ -1,6 +1,9 @@
 import numpy as np
 import argparse
+import ast
+import numbers
 from threading import Thread, Event
+import purge
 
 instructions = {
     '.': [np.array([0, 0]), 'no_operation'],
@@ -29,6 +32,21 @@ instructions = {
     'S': [np.array([8, 0]), 'push'],
     'P': [np.array([8, 1]), 'pop']}
 
+instruction_chars = list(instructions.keys())
+opcodes = {char: opcode for opcode, char in enumerate(instruction_chars)}
+instruction_values = np.array([instructions[char][0] for char in instruction_chars])
+instruction_handlers = [instructions[char][1] for char in instruction_chars]
+char_opcodes = np.full(128, opcodes['.'], dtype=np.uint8)
+for opcode, char in enumerate(instruction_chars):
+    char_opcodes[ord(char)] = opcode
+
+def encode(grid) -> np.array:
+    codes = np.ascontiguousarray(grid, dtype='<U1').view(np.uint32)
+    return char_opcodes[np.minimum(codes, len(char_opcodes) - 1)]
+
+def decode(grid) -> np.array:
+    return np.array(instruction_chars)[grid]
+
 deltas = {
     'left': np.array([0, -1]),
     'right': np.array([0, 1]),
@@ -44,33 +62,161 @@ colors = {
     'ip': 6}
 
 parser = argparse.ArgumentParser(description='Fungera - two-dimensional artificial life simulator')
+parser.add_argument('--config', default=None, help='TOML file with config values (command line flags take precedence)')
 parser.add_argument('--name', default='Simulation 1', help='Simulation name')
 parser.add_argument('--state', default='new', help='State file to load (new/last/filename)')
-line_args = parser.parse_args()
-
-config = {
-    'simulation_name': line_args.name,
-    'snapshot_to_load': line_args.state,
-    'memory_size': np.array([128, 128]),
-    'random_seed': 42,
-    'autosave_rate': [60, 1],
-    'cycle_gap': 5,
-    'random_rate': 7,
-    'memory_full_ratio': 0.7,
-    'kill_organisms_ratio': 0.3,
-    'is_running': True,
-    'memory_display_size': [200, 200],
-    'info_display_size': [30, 25],
-    'cell_size': 4,
-    'scroll_step': 50,
-    'stack_length': 8,
-    'organism_death_rate': 100,
-    'kill_if_no_child': 25000,
-    'penalize_parasitism': 100}
+parser.add_argument('--headless', action='store_true', help='Run without the pygame front end')
+parser.add_argument('--cycles', type=int, default=None, help='Number of cycles to run in headless mode')
+parser.add_argument('--time-limit', type=float, default=None, help='Seconds to run in headless mode')
+parser.add_argument('--snapshot-rate', type=int, default=0, help='Cycles between snapshots in headless mode (0 disables)')
+parser.add_argument('--compress', action='store_true', help='Compress snapshot sections (disables memory-mapped loading)')
+parser.add_argument('--keep-snapshots', type=int, default=10, help='Snapshots kept per simulation before the oldest are removed (0 keeps all)')
+parser.add_argument('--stats-rate', type=int, default=1000, help='Cycles between statistics lines in headless mode (0 disables)')
+parser.add_argument('--kill-policy', default='errors', choices=list(purge.policies),
+                    help='Which organisms a purge kills first')
+parser.add_argument('--cps', type=int, default=50, help='Target simulation cycles per second in the pygame front end (0 runs flat out)')
+parser.add_argument('--fps', type=int, default=50, help='Frame rate of the pygame front end')
+parser.add_argument('--workers', type=int, default=0, help='Split the memory into tiles stepped by this many worker processes')
+parser.add_argument('--engine', default='object', choices=['object', 'vector'], help='Execution engine (object/vector)')
+parser.add_argument('--memory-backend', default='dense', choices=['dense', 'chunked'],
+                    help='Store the world as dense arrays or as lazily allocated chunks (dense/chunked)')
+parser.add_argument('--memory-dir', default=None,
+                    help='Back chunked world storage with memory-mapped scratch files in this directory')
+parser.add_argument('--metrics-rate', type=int, default=0, help='Cycles between metric samples recorded to metrics/ (0 disables)')
+parser.add_argument('--profile', action='store_true', help='Count and time opcodes and cycle phases')
+parser.add_argument('--profile-rate', type=int, default=1000, help='Cycles between profile dumps to profiles/ (0 dumps only at exit)')
+parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                    help='Override a config value, e.g. --set random_rate=5 (repeatable)')
+
+options = {
+    'name': 'simulation_name',
+    'state': 'snapshot_to_load',
+    'engine': 'engine',
+    'workers': 'workers',
+    'headless': 'headless',
+    'cycles': 'max_cycles',
+    'time_limit': 'time_limit',
+    'snapshot_rate': 'snapshot_rate',
+    'compress': 'snapshot_compression',
+    'keep_snapshots': 'snapshot_keep',
+    'stats_rate': 'stats_rate',
+    'metrics_rate': 'metrics_rate',
+    'profile': 'profile',
+    'profile_rate': 'profile_rate',
+    'memory_backend': 'memory_backend',
+    'memory_dir': 'memory_directory',
+    'kill_policy': 'kill_policy',
+    'cps': 'target_cps',
+    'fps': 'frame_rate'}
+
+def defaults() -> dict:
+    config = {
+        'snapshot_archive': True,
+        'archive_capacity': 100000,
+        'memory_size': np.array([128, 128]),
+        'memory_chunk': 64,
+        'random_seed': 42,
+        'autosave_rate': [60, 1],
+        'cycle_gap': 5,
+        'random_rate': 7,
+        'mutation_seed': None,
+        'mutation_batch': 4096,
+        'copy_error_rate': 0.0,
+        'burst_rate': 0.0,
+        'burst_size': 8,
+        'burst_radius': 4,
+        'memory_full_ratio': 0.7,
+        'kill_organisms_ratio': 0.3,
+        'is_running': True,
+        'memory_display_size': [200, 200],
+        'info_display_size': [30, 25],
+        'cell_size': 4,
+        'scroll_step': 50,
+        'stack_length': 8,
+        'trace_capacity': 1 << 18,
+        'organism_death_rate': 100,
+        'kill_if_no_child': 25000,
+        'penalize_parasitism': 100}
+    for dest, key in options.items():
+        config[key] = parser.get_default(dest)
+    return config
+
+choices = {options[action.dest]: action.choices for action in parser._actions if action.dest in options and action.choices}
+
+def override(config: dict, key: str, value):
+    if key not in config:
+        raise ValueError("Unknown config key '{}'".format(key))
+    config[key] = np.array(value) if isinstance(config.get(key), np.ndarray) else value
+
+def validate(config: dict):
+    reference = defaults()
+    for key, value in config.items():
+        default = reference.get(key)
+        if key in choices and value not in choices[key]:
+            raise ValueError("Invalid {} '{}' (choose from {})".format(key, value, ', '.join(choices[key])))
+        if default is None or value is None:
+            continue
+        if isinstance(default, (np.ndarray, list)):
+            is_valid = np.ndim(value) == np.ndim(default) and np.issubdtype(np.asarray(value).dtype, np.number)
+        elif isinstance(default, numbers.Number):
+            is_valid = isinstance(value, numbers.Number)
+        else:
+            is_valid = isinstance(value, type(default))
+        if not is_valid:
+            raise ValueError("Invalid value {!r} for config key '{}'".format(value, key))
+
+def load_config(source=None) -> dict:
+    config = defaults()
+    if isinstance(source, str):
+        import toml
+        source = toml.load(source)
+    for key, value in (source or {}).items():
+        override(config, key, value)
+    validate(config)
+    return config
+
+def parse_args(argv=None) -> dict:
+    line_args = parser.parse_args(argv)
+    try:
+        config = load_config(line_args.config)
+    except Exception as e:
+        parser.error(f"Error loading config: {e}")
+    for dest, key in options.items():
+        value = getattr(line_args, dest)
+        if value != parser.get_default(dest):
+            config[key] = value
+    try:
+        for item in line_args.set:
+            key, _, value = item.partition('=')
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                pass
+            override(config, key, value)
+        validate(config)
+    except ValueError as e:
+        parser.error(f"Error in --set: {e}")
+    return config
+
+config = defaults()
+
+class InfoWindow:
+    def __init__(self, source=None):
+        self.text = ""
+        self.source = source
+
+    def erase(self):
+        self.text = ""
+
+    def print(self, text):
+        self.text = text
+
+    def get_text(self):
+        return self.text if self.source is None else self.source()
 
 class RepeatedTimer(Thread):
     def __init__(self, interval, function, args=None, kwargs=None):
-        Thread.__init__(self)
+        Thread.__init__(self, daemon=True)
         self.interval = interval
         self.function = function
         self.args = args if args is not None else []
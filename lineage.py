@@ -0,0 +1,112 @@
+import numpy as np
+
+causes = ['alive', 'errors', 'age', 'purge']
+fields = {'parent': np.int64, 'birth': np.int64, 'death': np.int64, 'cause': np.int8, 'children': np.int64}
+
+def jump(up: np.ndarray) -> np.ndarray:
+    while True:
+        following = up[up]
+        if np.array_equal(following, up):
+            return up
+        up = following
+
+class Lineage:
+    def __init__(self, capacity=1024):
+        self.count = 0
+        self.cycle = 0
+        self.parent = np.full(capacity, -1, dtype=np.int64)
+        self.birth = np.zeros(capacity, dtype=np.int64)
+        self.death = np.full(capacity, -1, dtype=np.int64)
+        self.cause = np.zeros(capacity, dtype=np.int8)
+        self.children = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        capacity = len(self.parent) * 2
+        for name in fields:
+            old = getattr(self, name)
+            new = np.full(capacity, -1 if name in ('parent', 'death') else 0, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def born(self, parent=None) -> int:
+        if self.count == len(self.parent):
+            self.grow()
+        organism_id = self.count
+        self.count += 1
+        self.parent[organism_id] = -1 if parent is None else parent
+        self.birth[organism_id] = self.cycle
+        if parent is not None and parent >= 0:
+            self.children[parent] += 1
+        return organism_id
+
+    def died(self, organism_id: int, cause: str):
+        if 0 <= organism_id < self.count:
+            self.death[organism_id] = self.cycle
+            self.cause[organism_id] = causes.index(cause)
+
+    def ancestors(self, organism_id: int) -> np.ndarray:
+        chain = []
+        organism_id = self.parent[organism_id]
+        while organism_id >= 0:
+            chain.append(organism_id)
+            organism_id = self.parent[organism_id]
+        return np.array(chain, dtype=np.int64)
+
+    def descendants(self, organism_id: int) -> np.ndarray:
+        ids = np.arange(organism_id, self.count)
+        up = self.parent[organism_id:self.count] - organism_id
+        outside = up < 0
+        up[outside] = ids[outside] - organism_id
+        up[0] = 0
+        roots = jump(up)
+        return ids[1:][roots[1:] == 0]
+
+    def alive(self, cycle: int = None) -> np.ndarray:
+        cycle = self.cycle if cycle is None else cycle
+        n = self.count
+        born = self.birth[:n] <= cycle
+        living = (self.death[:n] < 0) | (self.death[:n] > cycle)
+        return np.flatnonzero(born & living)
+
+    def founders(self, ids: np.ndarray) -> np.ndarray:
+        up = self.parent[:self.count].copy()
+        orphans = up < 0
+        up[orphans] = np.flatnonzero(orphans)
+        return jump(up)[ids]
+
+    def surviving(self, cycle: int = None):
+        return np.unique(self.founders(self.alive(cycle)), return_counts=True)
+
+    def pack(self) -> dict:
+        return {name: getattr(self, name)[:self.count].copy() for name in fields}
+
+    @classmethod
+    def unpack(cls, columns: dict, cycle: int = 0):
+        lineage = cls(max(1024, len(columns['parent'])))
+        lineage.count = len(columns['parent'])
+        lineage.cycle = cycle
+        for name in fields:
+            getattr(lineage, name)[:lineage.count] = columns[name]
+        return lineage
+
+class Journal:
+    def __init__(self):
+        self.births = []
+        self.deaths = []
+        self.cycle = 0
+
+    def born(self, parent=None) -> int:
+        self.births.append(-1 if parent is None else parent)
+        return -1 - len(self.births)
+
+    def died(self, organism_id: int, cause: str):
+        self.deaths.append((organism_id, cause))
+
+    def take(self):
+        births, deaths = self.births, self.deaths
+        self.births = []
+        self.deaths = []
+        return births, deaths
@@ -1,6 +1,11 @@
 import numpy as np
+import chunks
 import common as c
 
+dirty_tile = 16
+trace_span = 4
+trace_deltas = [(int(delta[0]), int(delta[1])) for delta in c.deltas.values()]
+
 class WindowStub:
     def __init__(self):
         pass
@@ -14,8 +19,13 @@ class WindowStub:
 class Memory:
     def __init__(self, memory_map=None, allocation_map=None, position=None):
         memory_size = c.config['memory_size']
+        if memory_map is None and allocation_map is None and c.config['memory_backend'] == 'chunked':
+            chunk = c.config['memory_chunk']
+            directory = c.config['memory_directory']
+            memory_map = chunks.ChunkedGrid(memory_size, np.uint8, c.opcodes['.'], chunk, directory)
+            allocation_map = chunks.ChunkedGrid(memory_size, np.uint8, 0, chunk, directory)
         if memory_map is None:
-            memory_map = np.full(memory_size, '.', dtype=str)
+            memory_map = np.full(memory_size, c.opcodes['.'], dtype=np.uint8)
         if allocation_map is None:
             allocation_map = np.zeros(memory_size, dtype=int)
         if position is None:
@@ -25,72 +35,235 @@ class Memory:
         self.position = position
         self.size = np.array([200, 200])
         self.window = WindowStub()
+        self.template_lines = {}
+        self.traces = {}
+        self.used = chunks.count_nonzero(allocation_map)
+        self.occupancy = None
+        self.dirty = self.dirty_tiles()
+        self.journal = None
+        self.mutations = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['template_lines'] = {}
+        state['traces'] = {}
+        state['occupancy'] = None
+        state['dirty'] = None
+        state['journal'] = None
+        state['mutations'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.template_lines = {}
+        self.traces = {}
+        self.used = chunks.count_nonzero(self.allocation_map)
+        self.occupancy = None
+        if self.memory_map.dtype.kind == 'U':
+            self.memory_map = c.encode(self.memory_map)
+        self.dirty = self.dirty_tiles()
+        self.journal = None
+        self.mutations = None
+
+    def dirty_tiles(self):
+        max_y, max_x = self.memory_map.shape
+        return np.ones((-(-max_y // dirty_tile), -(-max_x // dirty_tile)), dtype=bool)
+
+    def touch(self, y0, x0, y1, x1):
+        self.dirty[y0 // dirty_tile:(y1 - 1) // dirty_tile + 1, x0 // dirty_tile:(x1 - 1) // dirty_tile + 1] = True
+
+    def take_dirty(self):
+        dirty = self.dirty
+        self.dirty = np.zeros_like(dirty)
+        return dirty
 
     def is_time_to_kill(self):
-        used = np.count_nonzero(self.allocation_map)
-        total = self.allocation_map.size
-        return (used / total) > c.config['memory_full_ratio']
+        return (self.used / self.allocation_map.size) > c.config['memory_full_ratio']
+
+    def occupancy_table(self):
+        if self.occupancy is None:
+            self.occupancy = {}
+            grid = self.allocation_map
+            if chunks.is_chunked(grid):
+                for y0, x0, y1, x1 in grid.regions():
+                    self.index(y0, x0, y1, x1)
+            else:
+                max_y, max_x = grid.shape
+                padded = np.zeros((-(-max_y // dirty_tile) * dirty_tile, -(-max_x // dirty_tile) * dirty_tile), dtype=bool)
+                padded[:max_y, :max_x] = grid != 0
+                tiles = padded.reshape(padded.shape[0] // dirty_tile, dirty_tile, -1, dirty_tile).any(axis=(1, 3))
+                for ty, tx in zip(*np.nonzero(tiles)):
+                    self.index(ty * dirty_tile, tx * dirty_tile, (ty + 1) * dirty_tile, (tx + 1) * dirty_tile)
+        return self.occupancy
+
+    def index(self, y0, x0, y1, x1):
+        if self.occupancy is None or y1 <= y0 or x1 <= x0:
+            return
+        max_y, max_x = self.allocation_map.shape
+        for ty in range(y0 // dirty_tile, (y1 - 1) // dirty_tile + 1):
+            for tx in range(x0 // dirty_tile, (x1 - 1) // dirty_tile + 1):
+                top, left = ty * dirty_tile, tx * dirty_tile
+                block = self.allocation_map[top:min(top + dirty_tile, max_y), left:min(left + dirty_tile, max_x)] != 0
+                if block.any():
+                    table = np.zeros((dirty_tile + 1, dirty_tile + 1), dtype=np.int32)
+                    table[1:block.shape[0] + 1, 1:block.shape[1] + 1] = block.cumsum(axis=0).cumsum(axis=1)
+                    self.occupancy[ty, tx] = table
+                else:
+                    self.occupancy.pop((ty, tx), None)
+
+    def is_inside(self, y0, x0, y1, x1):
+        max_y, max_x = self.memory_map.shape
+        return y0 >= 0 and x0 >= 0 and y1 <= max_y and x1 <= max_x
 
     def is_allocated_region(self, address: np.array, size: np.array):
-        memory_size = c.config['memory_size']
-        if (address < 0).any():
-            return None
-        if (address + size > memory_size).any():
+        y0, x0 = int(address[0]), int(address[1])
+        y1, x1 = y0 + int(size[0]), x0 + int(size[1])
+        if not self.is_inside(y0, x0, y1, x1):
             return None
-        y0, x0 = address
-        y1, x1 = y0 + size[0], x0 + size[1]
-        region = self.allocation_map[y0:y1, x0:x1]
-        return bool(np.count_nonzero(region))
+        tiles = self.occupancy_table()
+        for ty in range(y0 // dirty_tile, (y1 - 1) // dirty_tile + 1):
+            top = ty * dirty_tile
+            a, b = max(y0 - top, 0), min(y1 - top, dirty_tile)
+            for tx in range(x0 // dirty_tile, (x1 - 1) // dirty_tile + 1):
+                table = tiles.get((ty, tx))
+                if table is not None:
+                    left = tx * dirty_tile
+                    c0, d = max(x0 - left, 0), min(x1 - left, dirty_tile)
+                    if table.item(b, d) - table.item(a, d) - table.item(b, c0) + table.item(a, c0):
+                        return True
+        return False
 
     def is_allocated(self, address: np.array):
-        memory_size = c.config['memory_size']
-        if (address < 0).any() or (address >= memory_size).any():
+        y, x = int(address[0]), int(address[1])
+        if not self.is_inside(y, x, y + 1, x + 1):
             return False
-        y, x = address
-        return bool(self.allocation_map[y, x])
+        return bool(self.allocation_map.item(y, x))
 
     def allocate(self, address: np.array, size: np.array):
-        memory_size = c.config['memory_size']
-        if (address < 0).any() or (address + size > memory_size).any():
+        y0, x0 = int(address[0]), int(address[1])
+        y1, x1 = y0 + int(size[0]), x0 + int(size[1])
+        if not self.is_inside(y0, x0, y1, x1):
             return
-        y0, x0 = address
-        y1, x1 = y0 + size[0], x0 + size[1]
+        region = self.allocation_map[y0:y1, x0:x1]
+        self.used += region.size - int(np.count_nonzero(region))
         self.allocation_map[y0:y1, x0:x1] = 1
+        self.index(y0, x0, y1, x1)
+        self.touch(y0, x0, y1, x1)
 
     def deallocate(self, address: np.array, size: np.array):
-        memory_size = c.config['memory_size']
-        if (address < 0).any() or (address + size > memory_size).any():
+        y0, x0 = int(address[0]), int(address[1])
+        y1, x1 = y0 + int(size[0]), x0 + int(size[1])
+        if not self.is_inside(y0, x0, y1, x1):
             return
-        y0, x0 = address
-        y1, x1 = y0 + size[0], x0 + size[1]
+        self.used -= int(np.count_nonzero(self.allocation_map[y0:y1, x0:x1]))
         self.allocation_map[y0:y1, x0:x1] = 0
+        self.index(y0, x0, y1, x1)
+        self.touch(y0, x0, y1, x1)
 
     def inst(self, address: np.array):
-        memory_size = c.config['memory_size']
-        if (address < 0).any() or (address >= memory_size).any():
-            return '.'
-        y, x = address
-        return self.memory_map[y, x]
+        return self.read(int(address[0]), int(address[1]))
+
+    def read(self, y: int, x: int) -> int:
+        max_y, max_x = self.memory_map.shape
+        if 0 <= y < max_y and 0 <= x < max_x:
+            return self.memory_map.item(y, x)
+        return c.opcodes['.']
 
     def write_inst(self, address: np.array, value):
-        memory_size = c.config['memory_size']
-        if (address < 0).any() or (address >= memory_size).any():
+        y, x = int(address[0]), int(address[1])
+        if not self.is_inside(y, x, y + 1, x + 1):
             return
-        y, x = address
-        instruction_chars = list(c.instructions.keys())
         if hasattr(value, '__iter__') and len(value) > 0:
-            char_index = int(value[0]) % len(instruction_chars)
-            self.memory_map[y, x] = instruction_chars[char_index]
+            value = value[0]
+        value = int(value) % len(c.instruction_chars)
+        if self.mutations is not None:
+            value = self.mutations.copy(value)
+        self.memory_map[y, x] = value
+        self.invalidate(y, x)
+        self.touch(y, x, y + 1, x + 1)
+
+    def mutate(self, ys: np.array, xs: np.array, values: np.array):
+        self.memory_map[ys, xs] = values
+        for y, x in zip(ys.tolist(), xs.tolist()):
+            self.invalidate(y, x)
+            self.touch(y, x, y + 1, x + 1)
+
+    def invalidate(self, y, x):
+        self.forget(y, x)
+        if self.journal is not None:
+            self.journal.append((y, x))
+
+    def forget(self, y, x):
+        self.template_lines.pop((0, y), None)
+        self.template_lines.pop((1, x), None)
+        traces = self.traces
+        if traces:
+            for dy, dx in trace_deltas:
+                for k in range(trace_span):
+                    key = (y - k * dy, x - k * dx, dy, dx)
+                    step = traces.get(key)
+                    if step is not None and k < step.span:
+                        del traces[key]
+
+    def remember(self, key: tuple, step):
+        if len(self.traces) >= c.config['trace_capacity']:
+            self.traces.clear()
+        self.traces[key] = step
+
+    def template_line(self, axis: int, index: int):
+        line = self.template_lines.get((axis, index))
+        if line is None:
+            cells = self.memory_map[index, :] if axis == 0 else self.memory_map[:, index]
+            positions = np.arange(len(cells))
+            is_template = (cells == c.opcodes['.']) | (cells == c.opcodes[':'])
+            next_stop = np.minimum.accumulate(np.where(is_template, len(cells), positions)[::-1])[::-1]
+            last_stop = np.maximum.accumulate(np.where(is_template, -1, positions))
+            line = (cells.tolist(), (next_stop - positions).tolist(), (positions - last_stop).tolist())
+            self.template_lines[(axis, index)] = line
+        return line
+
+    def find_template(self, address: np.array, delta: np.array, limit: int):
+        blank = c.opcodes['.']
+        y, x = int(address[0]), int(address[1])
+        if delta[0] == 0:
+            axis, index, position, step = 0, y, x, int(delta[1])
         else:
-            char_index = int(value) % len(instruction_chars)
-            self.memory_map[y, x] = instruction_chars[char_index]
+            axis, index, position, step = 1, x, y, int(delta[0])
+        length = self.memory_map.shape[1 - axis]
+        cells = runs = None
+        if 0 <= index < self.memory_map.shape[axis]:
+            cells, ahead, behind = self.template_line(axis, index)
+            runs = ahead if step > 0 else behind
 
-    def cycle(self):
-        memory_size = c.config['memory_size']
-        max_y, max_x = memory_size
-        y = np.random.randint(0, max_y)
-        x = np.random.randint(0, max_x)
-        self.memory_map[y, x] = np.random.choice(list(c.instructions.keys()))
+        def inst(offset):
+            p = position + offset * step
+            return cells[p] if cells is not None and 0 <= p < length else blank
+
+        run = 0
+        while 2 + run < limit:
+            p = position + (2 + run) * step
+            if cells is None or not 0 <= p < length:
+                run += 1
+            elif runs[p]:
+                run += runs[p]
+            else:
+                break
+        if 2 + run < limit:
+            template_size, start = run, 2 + run
+        else:
+            template_size, start = limit - 2, limit - 1
+        if template_size <= 0:
+            return None
+        template = [c.opcodes[':'] if inst(2 + i) == blank else blank for i in range(template_size)]
+        counter = 0
+        for i in range(start, limit):
+            if inst(i) == template[counter]:
+                counter += 1
+            else:
+                counter = 0
+            if counter == template_size:
+                return i
+        return None
 
     def get_grid(self):
         return self.memory_map
@@ -100,7 +273,11 @@ class Memory:
         y0, x0 = address
         y1, x1 = y0 + size[0], x0 + size[1]
         if y1 <= memory_size[0] and x1 <= memory_size[1]:
-            self.memory_map[y0:y1, x0:x1] = genome
+            self.memory_map[y0:y1, x0:x1] = c.encode(genome)
+            for y in range(y0, y1):
+                for x in range(x0, x1):
+                    self.forget(y, x)
+            self.touch(y0, x0, y1, x1)
 
     def clear(self):
         pass
@@ -118,5 +295,5 @@ class Memory:
     def toogle(self):
         return self
 
-memory = Memory()
+memory = None
 
@@ -0,0 +1,155 @@
+import atexit
+import json
+import os
+from collections import deque
+from threading import Thread, Condition
+import numpy as np
+import chunks
+import common as c
+
+columns = {
+    'cycle': ('<i8', ()),
+    'organisms': ('<i8', ()),
+    'memory_used': ('<f8', ()),
+    'births': ('<i8', ()),
+    'deaths_errors': ('<i8', ()),
+    'deaths_age': ('<i8', ()),
+    'deaths_purge': ('<i8', ()),
+    'mean_errors': ('<f8', ()),
+    'instructions': ('<i8', (len(c.instruction_chars),))}
+
+def schema() -> dict:
+    return {
+        'columns': {name: {'dtype': dtype, 'shape': list(shape)} for name, (dtype, shape) in columns.items()},
+        'instructions': c.instruction_chars}
+
+def rows(directory: str) -> int:
+    counts = []
+    for name, (dtype, shape) in columns.items():
+        filename = os.path.join(directory, name + '.bin')
+        size = os.path.getsize(filename) if os.path.exists(filename) else 0
+        counts.append(size // (np.dtype(dtype).itemsize * int(np.prod(shape))))
+    return min(counts)
+
+def read(directory: str) -> dict:
+    with open(os.path.join(directory, 'schema.json')) as f:
+        spec = json.load(f)['columns']
+    count = rows(directory)
+    data = {}
+    for name, column in spec.items():
+        shape = tuple(column['shape'])
+        array = np.fromfile(os.path.join(directory, name + '.bin'), dtype=column['dtype'],
+                            count=count * int(np.prod(shape)))
+        data[name] = array.reshape((count,) + shape)
+    return data
+
+class Recorder:
+    def __init__(self, directory: str, rate: int, capacity=1024, chunk=256):
+        self.directory = directory
+        self.rate = rate
+        self.capacity = capacity
+        self.chunk = min(chunk, capacity)
+        self.buffers = {name: np.zeros((capacity,) + shape, dtype=dtype) for name, (dtype, shape) in columns.items()}
+        self.total = 0
+        self.flushed = 0
+        self.jobs = deque()
+        self.condition = Condition()
+        self.is_busy = False
+        self.is_stopped = False
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def is_sample_due(self, cycle: int) -> bool:
+        return cycle % self.rate == 0
+
+    def sample(self, cycle: int, memory, queue):
+        queue.sync()
+        organisms = queue.organisms
+        births, deaths = queue.take_events()
+        row = self.total % self.capacity
+        b = self.buffers
+        b['cycle'][row] = cycle
+        b['organisms'][row] = len(organisms)
+        b['memory_used'][row] = memory.used / memory.allocation_map.size
+        b['births'][row] = births
+        b['deaths_errors'][row] = deaths['errors']
+        b['deaths_age'][row] = deaths['age']
+        b['deaths_purge'][row] = deaths['purge']
+        b['mean_errors'][row] = np.mean([organism.errors for organism in organisms]) if organisms else 0.0
+        b['instructions'][row] = chunks.bincount(memory.memory_map, minlength=len(c.instruction_chars))
+        self.total += 1
+        if self.total - self.flushed >= self.chunk:
+            self.submit()
+
+    def submit(self):
+        if self.total == self.flushed:
+            return
+        indices = np.arange(self.flushed, self.total) % self.capacity
+        block = {name: buffer[indices] for name, buffer in self.buffers.items()}
+        self.flushed = self.total
+        with self.condition:
+            while len(self.jobs) >= 2:
+                self.condition.wait()
+            self.jobs.append(block)
+            self.condition.notify_all()
+
+    def flush(self):
+        self.submit()
+        with self.condition:
+            while self.jobs or self.is_busy:
+                self.condition.wait()
+
+    def close(self):
+        self.flush()
+        with self.condition:
+            self.is_stopped = True
+            self.condition.notify_all()
+        self.thread.join()
+        atexit.unregister(self.flush)
+
+    def rewind(self, cycle: int):
+        self.flush()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            filename = os.path.join(self.directory, 'schema.json')
+            if os.path.exists(filename):
+                with open(filename) as f:
+                    is_same = json.load(f) == schema()
+            else:
+                is_same = False
+            kept = 0
+            if is_same:
+                cycles = np.fromfile(os.path.join(self.directory, 'cycle.bin'), dtype=columns['cycle'][0])
+                kept = int(np.searchsorted(cycles[:rows(self.directory)], cycle, side='right'))
+            for name, (dtype, shape) in columns.items():
+                with open(os.path.join(self.directory, name + '.bin'), 'ab') as f:
+                    f.truncate(kept * np.dtype(dtype).itemsize * int(np.prod(shape)))
+            with open(filename, 'w') as f:
+                json.dump(schema(), f, indent=2)
+        except Exception as e:
+            print(f"Error opening metrics: {e}")
+
+    def append(self, block: dict):
+        for name, array in block.items():
+            with open(os.path.join(self.directory, name + '.bin'), 'ab') as f:
+                f.write(np.ascontiguousarray(array).tobytes())
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.jobs and not self.is_stopped:
+                    self.condition.wait()
+                if not self.jobs:
+                    return
+                block = self.jobs.popleft()
+                self.is_busy = True
+                self.condition.notify_all()
+            try:
+                self.append(block)
+            except Exception as e:
+                print(f"Error writing metrics: {e}")
+            finally:
+                with self.condition:
+                    self.is_busy = False
+                    self.condition.notify_all()
@@ -0,0 +1,114 @@
+import numpy as np
+import common as c
+
+class Stream:
+    def __init__(self, seed_sequence, batch: int, draw):
+        self.rng = np.random.default_rng(seed_sequence)
+        self.batch = batch
+        self.draw = draw
+        self.refill()
+
+    def refill(self):
+        self.origin = self.rng.bit_generator.state
+        self.values = self.draw(self.rng, self.batch)
+        self.index = 0
+
+    def take(self, count: int) -> list:
+        parts = []
+        while count > 0:
+            if self.index == self.batch:
+                self.refill()
+            n = min(count, self.batch - self.index)
+            parts.append([values[self.index:self.index + n] for values in self.values])
+            self.index += n
+            count -= n
+        if not parts:
+            return [values[:0] for values in self.values]
+        if len(parts) == 1:
+            return parts[0]
+        return [np.concatenate(arrays) for arrays in zip(*parts)]
+
+    def state(self) -> dict:
+        return {'origin': self.origin, 'index': self.index}
+
+    def restore(self, state: dict):
+        self.rng.bit_generator.state = state['origin']
+        self.refill()
+        self.index = state['index']
+
+class Mutations:
+    def __init__(self, seed, batch: int = None):
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.batch = batch or c.config['mutation_batch']
+        self.random_rate = c.config['random_rate']
+        self.copy_error_rate = c.config['copy_error_rate']
+        self.burst_rate = c.config['burst_rate']
+        self.burst_size = c.config['burst_size']
+        self.burst_radius = c.config['burst_radius']
+        max_y, max_x = c.config['memory_size']
+        count = len(c.instruction_chars)
+        radius = self.burst_radius
+        background, copies, bursts, sites, cells = self.seed_sequence.spawn(5)
+        self.streams = {
+            'background': Stream(background, self.batch, lambda rng, n: [
+                rng.integers(0, max_y, n), rng.integers(0, max_x, n), rng.integers(0, count, n)]),
+            'copies': Stream(copies, self.batch, lambda rng, n: [
+                rng.geometric(self.copy_error_rate, n) if self.copy_error_rate else np.zeros(n, dtype=np.int64),
+                rng.integers(0, count, n)]),
+            'bursts': Stream(bursts, self.batch, lambda rng, n: [
+                rng.poisson(self.burst_rate, n)]),
+            'sites': Stream(sites, self.batch, lambda rng, n: [
+                rng.integers(0, max_y, n), rng.integers(0, max_x, n), rng.poisson(self.burst_size, n)]),
+            'cells': Stream(cells, self.batch, lambda rng, n: [
+                rng.integers(-radius, radius + 1, n), rng.integers(-radius, radius + 1, n), rng.integers(0, count, n)])}
+        self.copy_value = 0
+        self.copy_gap = self.next_gap()
+
+    def spawn(self, count: int) -> list:
+        return [Mutations(seed_sequence, self.batch) for seed_sequence in self.seed_sequence.spawn(count)]
+
+    def next_gap(self):
+        if not self.copy_error_rate:
+            return 0
+        gap, value = self.streams['copies'].take(1)
+        self.copy_value = int(value[0])
+        return int(gap[0])
+
+    def copy(self, value: int) -> int:
+        if not self.copy_gap:
+            return value
+        self.copy_gap -= 1
+        if self.copy_gap:
+            return value
+        value = self.copy_value
+        self.copy_gap = self.next_gap()
+        return value
+
+    def step(self, memory, cycle: int):
+        if self.random_rate and cycle % self.random_rate == 0:
+            memory.mutate(*self.streams['background'].take(1))
+        if self.burst_rate:
+            bursts = int(self.streams['bursts'].take(1)[0][0])
+            if bursts:
+                self.burst(memory, bursts)
+
+    def burst(self, memory, bursts: int):
+        max_y, max_x = memory.memory_map.shape
+        ys, xs, sizes = self.streams['sites'].take(bursts)
+        dy, dx, values = self.streams['cells'].take(int(sizes.sum()))
+        ys = np.repeat(ys, sizes) + dy
+        xs = np.repeat(xs, sizes) + dx
+        inside = (ys >= 0) & (ys < max_y) & (xs >= 0) & (xs < max_x)
+        memory.mutate(ys[inside], xs[inside], values[inside])
+
+    def state(self) -> dict:
+        state = {name: stream.state() for name, stream in self.streams.items()}
+        state['copy_gap'] = self.copy_gap
+        state['copy_value'] = self.copy_value
+        return state
+
+    def restore(self, state: dict):
+        for name, stream in self.streams.items():
+            stream.restore(state[name])
+        self.copy_gap = state['copy_gap']
+        self.copy_value = state['copy_value']
@@ -1,6 +1,5 @@
 import numpy as np
-import uuid
-from copy import copy
+import archive
 import common as c
 import memory as m
 import queue as q
@@ -13,7 +12,102 @@ class RegsDict(dict):
             raise ValueError
         super().__setitem__(key, value)
 
+registers = {reg: 2 * r for r, reg in enumerate(RegsDict.allowed_keys)}
+mods = {'x': 0, 'y': 1}
+values = [(int(value[0]), int(value[1])) for value in c.instruction_values]
+turns = {'move_' + name: (int(delta[0]), int(delta[1])) for name, delta in c.deltas.items()}
+transfers = {'allocate_child': 'allocate', 'load_inst': 'load', 'write_inst': 'write'}
+terminators = set(turns) | {'if_not_zero', 'write_inst'}
+trace_length = 64
+steps = {}
+state_fields = ('organism_id', 'parent', 'genome', 'slot', 'ip', 'delta', 'start', 'size', 'regs', 'stack', 'errors',
+                'child_size', 'child_start', 'is_selected', 'reproduction_cycle', 'children')
+
+def decode(name: str, a: str, b: str, d: str):
+    if name in turns:
+        return 'turn', turns[name], 1
+    if name == 'split_child':
+        return 'split_child', (), 1
+    if name in ('if_not_zero', 'increment', 'decrement'):
+        skip = int(a in mods)
+        r = registers.get(b if skip else a)
+        if r is None:
+            return None, (), 2 + skip
+        first, last = (r + mods[a], r + mods[a] + 1) if skip else (r, r + 2)
+        if name == 'if_not_zero':
+            return 'branch', (first, last, skip), 2 + skip
+        return 'increase', (first, last, 1 if name == 'increment' else -1), 2 + skip
+    r1, r2, r3 = registers.get(a), registers.get(b), registers.get(d)
+    if name in ('find_template', 'zero', 'one', 'push', 'pop'):
+        if r1 is None:
+            return None, (), 2
+        if name == 'find_template':
+            return 'find', (r1,), 2
+        if name in ('zero', 'one'):
+            return 'assign', (r1, int(name == 'one')), 2
+        return name, (r1,), 2
+    if name == 'subtract':
+        if r1 is None or r2 is None or r3 is None:
+            return None, (), 4
+        return 'difference', (r1, r2, r3), 4
+    if name in transfers:
+        if r1 is None or r2 is None:
+            return None, (), 3
+        return transfers[name], (r1, r2), 3
+    return None, (), 1
+
+class Registers:
+    __slots__ = ('values',)
+
+    def __init__(self, values: list):
+        self.values = values
+
+    def __getitem__(self, key):
+        r = registers[key]
+        return np.array(self.values[r:r + 2])
+
+    def __setitem__(self, key, value):
+        if key not in registers:
+            raise ValueError
+        r = registers[key]
+        self.values[r], self.values[r + 1] = int(value[0]), int(value[1])
+
+    def __contains__(self, key):
+        return key in registers
+
+    def __iter__(self):
+        return iter(registers)
+
+    def __len__(self):
+        return len(registers)
+
+    def keys(self):
+        return registers.keys()
+
+    def items(self):
+        return [(reg, self[reg]) for reg in registers]
+
+def pair(first: str, second: str):
+    def get(self):
+        return np.array([getattr(self, first), getattr(self, second)])
+
+    def set(self, value):
+        setattr(self, first, int(value[0]))
+        setattr(self, second, int(value[1]))
+    return property(get, set)
+
 class Organism:
+    __slots__ = ('organism_id', 'parent', 'genome', 'slot', 'is_selected', 'errors', 'reproduction_cycle', 'children',
+                 'y', 'x', 'dy', 'dx', 'start_y', 'start_x', 'height', 'width',
+                 'child_y', 'child_x', 'child_height', 'child_width', 'reg_values', 'frames')
+
+    ip = pair('y', 'x')
+    delta = pair('dy', 'dx')
+    start = pair('start_y', 'start_x')
+    size = pair('height', 'width')
+    child_start = pair('child_y', 'child_x')
+    child_size = pair('child_height', 'child_width')
+
     def __init__(
         self,
         address: np.array,
@@ -29,273 +123,225 @@ class Organism:
         is_selected: bool = False,
         children: int = 0,
         reproduction_cycle: int = 0,
-        parent: uuid.UUID = None,
-        organism_id: uuid.UUID = None,):
-        self.organism_id = uuid.uuid4() if organism_id is None else organism_id
+        parent: int = None,
+        organism_id: int = None,
+        genome: bytes = None,
+        parent_genome: bytes = None,):
+        self.organism_id = q.queue.lineage.born(parent) if organism_id is None else organism_id
         self.parent = parent
-        if address is not None:
-            address = np.array(address)
-        self.ip = np.array(address) if ip is None and address is not None else (ip if ip is not None else np.array([0, 0]))
-        self.delta = delta if delta is not None else np.array([0, 1])
-        self.size = np.array(size)
-        self.start = np.array(address) if start is None and address is not None else (start if start is not None else np.array([0, 0]))
-        self.regs = regs if regs is not None else RegsDict({
-            'a': np.array([0, 0]),
-            'b': np.array([0, 0]),
-            'c': np.array([0, 0]),
-            'd': np.array([0, 0]),})
+        self.genome = genome
+        self.slot = None
+        self.ip = ip if ip is not None else (address if address is not None else (0, 0))
+        self.delta = delta if delta is not None else (0, 1)
+        self.size = size
+        self.start = start if start is not None else (address if address is not None else (0, 0))
+        self.reg_values = [0] * 8
+        if regs is not None:
+            self.regs = regs
         self.stack = stack if stack is not None else []
         self.errors = errors
-        self.child_size = child_size if child_size is not None else np.array([0, 0])
-        self.child_start = child_start if child_start is not None else np.array([0, 0])
+        self.child_size = child_size if child_size is not None else (0, 0)
+        self.child_start = child_start if child_start is not None else (0, 0)
         self.is_selected = is_selected
         self.reproduction_cycle = reproduction_cycle
         self.children = children
         if address is not None:
-            m.memory.allocate(address, self.size)
+            m.memory.allocate(address, size)
         q.queue.add_organism(self)
         if start is None and address is not None:
-            q.queue.archive.append(copy(self))
-        self.mods = {'x': 0, 'y': 1}
-
-    def no_operation(self):
-        pass
-
-    def move_up(self):
-        self.delta = c.deltas['up']
-
-    def move_down(self):
-        self.delta = c.deltas['down']
-
-    def move_right(self):
-        self.delta = c.deltas['right']
-
-    def move_left(self):
-        self.delta = c.deltas['left']
-
-    def ip_offset(self, offset: int = 0) -> np.array:
-        return self.ip + offset * self.delta
-
-    def inst(self, offset: int = 0) -> str:
-        return m.memory.inst(self.ip_offset(offset))
-
-    def find_template(self):
-        try:
-            register = self.inst(1)
-            if register not in self.regs:
-                return
-            template = []
-            max_size = min(max(self.size), 100)  
-            for i in range(2, max_size):
-                inst_char = self.inst(i)
-                if inst_char in ['.', ':']:
-                    template.append(':' if inst_char == '.' else '.')
-                else:
-                    break
-            if not template:
-                return
-            counter = 0
-            for i in range(i, max_size):
-                if self.inst(i) == template[counter]:
-                    counter += 1
-                else:
-                    counter = 0
-                if counter == len(template):
-                    self.regs[register] = self.ip + i * self.delta
-                    break
-        except:
-            pass
-
-    def if_not_zero(self):
-        try:
-            if self.inst(1) in self.mods.keys():
-                reg_name = self.inst(2)
-                if reg_name in self.regs:
-                    value = self.regs[reg_name][self.mods[self.inst(1)]]
-                    start_from = 1
-                else:
-                    return
-            else:
-                reg_name = self.inst(1)
-                if reg_name in self.regs:
-                    value = self.regs[reg_name]
-                    start_from = 0
-                else:
-                    return
-            if not np.any(value):
-                self.ip = self.ip_offset(start_from + 1)
-            else:
-                self.ip = self.ip_offset(start_from + 2)
-        except:
-            pass
-
-    def increment(self):
-        try:
-            if self.inst(1) in self.mods.keys():
-                reg_name = self.inst(2)
-                if reg_name in self.regs:
-                    self.regs[reg_name][self.mods[self.inst(1)]] += 1
-            else:
-                reg_name = self.inst(1)
-                if reg_name in self.regs:
-                    self.regs[reg_name] += 1
-        except:
-            pass
-
-    def decrement(self):
-        try:
-            if self.inst(1) in self.mods.keys():
-                reg_name = self.inst(2)
-                if reg_name in self.regs:
-                    self.regs[reg_name][self.mods[self.inst(1)]] -= 1
+            self.genome = q.queue.archive.add(m.memory, address, size, parent_genome)
+            q.queue.births += 1
+
+    @property
+    def regs(self):
+        return Registers(self.reg_values)
+
+    @regs.setter
+    def regs(self, regs):
+        self.reg_values = [0] * 8
+        for reg in RegsDict.allowed_keys:
+            Registers(self.reg_values)[reg] = regs[reg]
+
+    @property
+    def stack(self):
+        return [np.array(frame) for frame in self.frames]
+
+    @stack.setter
+    def stack(self, stack):
+        self.frames = [(int(frame[0]), int(frame[1])) for frame in stack]
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in state_fields if hasattr(self, name)}
+
+    def __setstate__(self, state):
+        self.genome = None
+        self.slot = None
+        for name, value in state.items():
+            if name in state_fields:
+                setattr(self, name, value)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.compile_dispatch()
+
+    @classmethod
+    def compile_dispatch(cls):
+        cls.interpreters = [cls.interpreter(name) for name in c.instruction_handlers]
+        cls.dispatch = cls.interpreters
+        cls.is_traced = True
+
+    @classmethod
+    def interpreter(cls, name: str):
+        def handler(organism):
+            executor, args, _ = decode(name, organism.inst(1), organism.inst(2), organism.inst(3))
+            if executor is not None:
+                return getattr(organism, executor)(*args)
+        return handler
+
+    @classmethod
+    def compile_step(cls, executor: str, args: tuple, span: int):
+        key = (cls, executor, args, span)
+        step = steps.get(key)
+        if step is None:
+            if executor is None:
+                def step(organism):
+                    pass
             else:
-                reg_name = self.inst(1)
-                if reg_name in self.regs:
-                    self.regs[reg_name] -= 1
-        except:
-            pass
+                method = getattr(cls, executor)
+
+                def step(organism):
+                    return method(organism, *args)
+            step.span = span
+            steps[key] = step
+        return step
+
+    def trace(self):
+        memory = m.memory
+        max_y, max_x = memory.memory_map.shape
+        y, x, dy, dx = self.y, self.x, self.dy, self.dx
+        first = None
+        for _ in range(trace_length):
+            key = (y, x, dy, dx)
+            if first is not None and key in memory.traces:
+                break
+            name = c.instruction_handlers[memory.read(y, x)]
+            operands = [c.instruction_chars[memory.read(y + k * dy, x + k * dx)] for k in range(1, m.trace_span)]
+            step = self.compile_step(*decode(name, *operands))
+            memory.remember(key, step)
+            first = first or step
+            y, x = y + dy, x + dx
+            if name in terminators or not (0 <= y < max_y and 0 <= x < max_x):
+                break
+        return first
+
+    def ip_offset(self, offset: int = 0) -> tuple:
+        return self.y + offset * self.dy, self.x + offset * self.dx
 
-    def zero(self):
-        try:
-            reg_name = self.inst(1)
-            if reg_name in self.regs:
-                self.regs[reg_name] = np.array([0, 0])
-        except:
-            pass
+    def inst(self, offset: int = 0) -> str:
+        return c.instruction_chars[m.memory.read(self.y + offset * self.dy, self.x + offset * self.dx)]
 
-    def one(self):
-        try:
-            reg_name = self.inst(1)
-            if reg_name in self.regs:
-                self.regs[reg_name] = np.array([1, 1])
-        except:
-            pass
+    def turn(self, dy: int, dx: int):
+        self.dy, self.dx = dy, dx
 
-    def subtract(self):
-        try:
-            reg1 = self.inst(1)
-            reg2 = self.inst(2)
-            reg3 = self.inst(3)
-            if all(reg in self.regs for reg in [reg1, reg2, reg3]):
-                self.regs[reg3] = self.regs[reg1] - self.regs[reg2]
-        except:
-            pass
+    def find(self, r: int):
+        offset = m.memory.find_template((self.y, self.x), (self.dy, self.dx), min(max(self.height, self.width), 100))
+        if offset is not None:
+            self.reg_values[r] = self.y + offset * self.dy
+            self.reg_values[r + 1] = self.x + offset * self.dx
 
-    def allocate_child(self):
-        try:
-            reg1 = self.inst(1)
-            reg2 = self.inst(2)
-            if reg1 not in self.regs or reg2 not in self.regs:
-                return
-            size = np.copy(self.regs[reg1])
-            if (size <= 0).any():
-                return
-            max_search = min(max(c.config['memory_size']), 100)
-            is_space_found = False
-            for i in range(2, max_search):
-                test_pos = self.ip_offset(i)
-                is_allocated_region = m.memory.is_allocated_region(test_pos, size)
-                if is_allocated_region is None:
-                    break
-                if not is_allocated_region:
-                    self.child_start = test_pos
-                    self.regs[reg2] = np.copy(self.child_start)
-                    is_space_found = True
-                    break
-            if is_space_found:
-                self.child_size = np.copy(size)
-                m.memory.allocate(self.child_start, self.child_size)
-        except:
-            pass
+    def branch(self, first: int, last: int, skip: int):
+        is_zero = not any(self.reg_values[first:last])
+        self.y, self.x = self.ip_offset(skip + 1 if is_zero else skip + 2)
 
-    def load_inst(self):
-        try:
-            reg1 = self.inst(1)
-            reg2 = self.inst(2)
-            if reg1 in self.regs and reg2 in self.regs:
-                inst_char = m.memory.inst(self.regs[reg1])
-                if inst_char in c.instructions:
-                    self.regs[reg2] = c.instructions[inst_char][0]
-        except:
-            pass
+    def increase(self, first: int, last: int, amount: int):
+        for i in range(first, last):
+            self.reg_values[i] += amount
 
-    def write_inst(self):
-        try:
-            if not np.array_equal(self.child_size, np.array([0, 0])):
-                reg1 = self.inst(1)
-                reg2 = self.inst(2)
-                if reg1 in self.regs and reg2 in self.regs:
-                    m.memory.write_inst(self.regs[reg1], self.regs[reg2])
-        except:
-            pass
+    def assign(self, r: int, value: int):
+        self.reg_values[r] = self.reg_values[r + 1] = value
 
-    def push(self):
-        try:
-            if len(self.stack) < c.config['stack_length']:
-                reg_name = self.inst(1)
-                if reg_name in self.regs:
-                    self.stack.append(np.copy(self.regs[reg_name]))
-        except:
-            pass
+    def difference(self, r1: int, r2: int, r3: int):
+        v = self.reg_values
+        v[r3], v[r3 + 1] = v[r1] - v[r2], v[r1 + 1] - v[r2 + 1]
 
-    def pop(self):
-        try:
-            if self.stack:
-                reg_name = self.inst(1)
-                if reg_name in self.regs:
-                    self.regs[reg_name] = np.copy(self.stack.pop())
-        except:
-            pass
+    def allocate(self, r1: int, r2: int):
+        size = (self.reg_values[r1], self.reg_values[r1 + 1])
+        if size[0] <= 0 or size[1] <= 0:
+            return
+        max_search = min(max(c.config['memory_size']), 100)
+        for i in range(2, max_search):
+            test_pos = self.ip_offset(i)
+            is_allocated_region = m.memory.is_allocated_region(test_pos, size)
+            if is_allocated_region is None:
+                break
+            if not is_allocated_region:
+                self.child_y, self.child_x = test_pos
+                self.reg_values[r2], self.reg_values[r2 + 1] = test_pos
+                self.child_height, self.child_width = size
+                m.memory.allocate(test_pos, size)
+                break
+
+    def load(self, r1: int, r2: int):
+        v = self.reg_values
+        v[r2], v[r2 + 1] = values[m.memory.read(v[r1], v[r1 + 1])]
+
+    def write(self, r1: int, r2: int):
+        if self.child_height or self.child_width:
+            v = self.reg_values
+            m.memory.write_inst((v[r1], v[r1 + 1]), (v[r2], v[r2 + 1]))
+
+    def push(self, r: int):
+        if len(self.frames) < c.config['stack_length']:
+            self.frames.append((self.reg_values[r], self.reg_values[r + 1]))
+
+    def pop(self, r: int):
+        if self.frames:
+            self.reg_values[r], self.reg_values[r + 1] = self.frames.pop()
 
     def split_child(self):
-        try:
-            if not np.array_equal(self.child_size, np.array([0, 0])):
-                m.memory.deallocate(self.child_start, self.child_size)
-                self.__class__(self.child_start, self.child_size, parent=self.organism_id)
-                self.children += 1
-                self.reproduction_cycle = 0
-            self.child_size = np.array([0, 0])
-            self.child_start = np.array([0, 0])
-        except:
-            pass
+        if self.child_height or self.child_width:
+            child_start = (self.child_y, self.child_x)
+            child_size = (self.child_height, self.child_width)
+            m.memory.deallocate(child_start, child_size)
+            self.__class__(child_start, child_size, parent=self.organism_id, parent_genome=self.genome)
+            self.children += 1
+            self.reproduction_cycle = 0
+        self.child_y = self.child_x = self.child_height = self.child_width = 0
 
     def __lt__(self, other):
         return self.errors < other.errors
 
     def kill(self):
-        try:
-            m.memory.deallocate(self.start, self.size)
-            self.size = np.array([0, 0])
-            if not np.array_equal(self.child_size, np.array([0, 0])):
-                m.memory.deallocate(self.child_start, self.child_size)
-            self.child_size = np.array([0, 0])
-        except:
-            pass
+        m.memory.deallocate((self.start_y, self.start_x), (self.height, self.width))
+        self.height = self.width = 0
+        if self.child_height or self.child_width:
+            m.memory.deallocate((self.child_y, self.child_x), (self.child_height, self.child_width))
+        self.child_height = self.child_width = 0
+
+    def is_parasitic(self) -> bool:
+        penalty = c.config['penalize_parasitism']
+        return bool(penalty and
+                    max(abs(self.y - self.start_y), abs(self.x - self.start_x)) > penalty and
+                    not m.memory.is_allocated((self.y, self.x)))
 
     def cycle(self):
-        try:
-            current_inst = self.inst()
-            if current_inst in c.instructions:
-                method_name = c.instructions[current_inst][1]
-                if hasattr(self, method_name):
-                    getattr(self, method_name)()
-            if (c.config['penalize_parasitism'] and 
-                not m.memory.is_allocated(self.ip) and
-                max(np.abs(self.ip - self.start)) > c.config['penalize_parasitism']):
-                raise ValueError("Parasitism penalty")
-        except Exception:
+        if self.is_traced:
+            step = m.memory.traces.get((self.y, self.x, self.dy, self.dx)) or self.trace()
+        else:
+            step = self.dispatch[m.memory.read(self.y, self.x)]
+        if step(self) or self.is_parasitic():
             self.errors += 1
-        new_ip = self.ip + self.delta
+        new_y, new_x = self.y + self.dy, self.x + self.dx
         self.reproduction_cycle += 1
         if (self.errors > c.config['organism_death_rate'] or
             self.reproduction_cycle > c.config['kill_if_no_child']):
-            if self in q.queue.organisms:
-                q.queue.organisms.remove(self)
+            q.queue.record_death(self.organism_id, 'errors' if self.errors > c.config['organism_death_rate'] else 'age')
+            q.queue.remove(self)
             self.kill()
             return
-        if (new_ip < 0).any() or (new_ip >= c.config['memory_size']).any():
-            return
-        self.ip = np.copy(new_ip)
+        max_y, max_x = m.memory.memory_map.shape
+        if 0 <= new_y < max_y and 0 <= new_x < max_x:
+            self.y, self.x = new_y, new_x
 
     def update(self):
         pass
@@ -316,9 +362,69 @@ class Organism:
             children=self.children,
             reproduction_cycle=self.reproduction_cycle,
             parent=self.parent,
+            genome=self.genome,
             organism_id=self.organism_id,)
 
+Organism.compile_dispatch()
+
+def pack(organisms) -> dict:
+    count = len(organisms)
+    stack_length = max([c.config['stack_length']] + [len(organism.frames) for organism in organisms])
+    columns = {
+        'ip': np.array([(organism.y, organism.x) for organism in organisms], dtype=np.int64).reshape(count, 2),
+        'delta': np.array([(organism.dy, organism.dx) for organism in organisms], dtype=np.int64).reshape(count, 2),
+        'start': np.array([(organism.start_y, organism.start_x) for organism in organisms], dtype=np.int64).reshape(count, 2),
+        'size': np.array([(organism.height, organism.width) for organism in organisms], dtype=np.int64).reshape(count, 2),
+        'regs': np.array([organism.reg_values for organism in organisms],
+                         dtype=np.int64).reshape(count, len(RegsDict.allowed_keys), 2),
+        'stack': np.zeros((count, stack_length, 2), dtype=np.int64),
+        'depth': np.array([len(organism.frames) for organism in organisms], dtype=np.int64),
+        'errors': np.array([organism.errors for organism in organisms], dtype=np.int64),
+        'child_size': np.array([(organism.child_height, organism.child_width) for organism in organisms],
+                               dtype=np.int64).reshape(count, 2),
+        'child_start': np.array([(organism.child_y, organism.child_x) for organism in organisms],
+                                dtype=np.int64).reshape(count, 2),
+        'reproduction_cycle': np.array([organism.reproduction_cycle for organism in organisms], dtype=np.int64),
+        'children': np.array([organism.children for organism in organisms], dtype=np.int64),
+        'is_selected': np.array([organism.is_selected for organism in organisms], dtype=bool),
+        'is_full': np.array([isinstance(organism, OrganismFull) for organism in organisms], dtype=bool),
+        'organism_id': np.array([organism.organism_id for organism in organisms], dtype=np.int64),
+        'parent': np.array([-1 if organism.parent is None else organism.parent for organism in organisms], dtype=np.int64),
+        'genome': np.frombuffer(b''.join(organism.genome or archive.none for organism in organisms),
+                                dtype=np.uint8).reshape(count, archive.digest_size)}
+    for i, organism in enumerate(organisms):
+        if organism.frames:
+            columns['stack'][i, :len(organism.frames)] = organism.frames
+    return columns
+
+def unpack(columns: dict) -> list:
+    organisms = []
+    for i in range(len(columns['ip'])):
+        cls = OrganismFull if columns['is_full'][i] else Organism
+        organism = cls.__new__(cls)
+        organism.organism_id = int(columns['organism_id'][i])
+        organism.parent = int(columns['parent'][i]) if columns['parent'][i] >= 0 else None
+        genome = columns['genome'][i].tobytes() if 'genome' in columns else archive.none
+        organism.genome = genome if any(genome) else None
+        organism.slot = None
+        organism.ip = columns['ip'][i]
+        organism.delta = columns['delta'][i]
+        organism.size = columns['size'][i]
+        organism.start = columns['start'][i]
+        organism.reg_values = columns['regs'][i].ravel().tolist()
+        organism.frames = [tuple(frame) for frame in columns['stack'][i, :columns['depth'][i]].tolist()]
+        organism.errors = int(columns['errors'][i])
+        organism.child_size = columns['child_size'][i]
+        organism.child_start = columns['child_start'][i]
+        organism.is_selected = bool(columns['is_selected'][i])
+        organism.reproduction_cycle = int(columns['reproduction_cycle'][i])
+        organism.children = int(columns['children'][i])
+        organisms.append(organism)
+    return organisms
+
 class OrganismFull(Organism):
+    __slots__ = ()
+
     def __init__(
         self,
         address: np.array,
@@ -334,8 +440,10 @@ class OrganismFull(Organism):
         is_selected: bool = False,
         children: int = 0,
         reproduction_cycle: int = 0,
-        parent: uuid.UUID = None,
-        organism_id: uuid.UUID = None,):
+        parent: int = None,
+        organism_id: int = None,
+        genome: bytes = None,
+        parent_genome: bytes = None,):
 
         super(OrganismFull, self).__init__(
             address=address,
@@ -352,7 +460,9 @@ class OrganismFull(Organism):
             children=children,
             reproduction_cycle=reproduction_cycle,
             parent=parent,
-            organism_id=organism_id,)
+            organism_id=organism_id,
+            genome=genome,
+            parent_genome=parent_genome,)
         self.update()
 
     def update_window(self, size, start, color):
@@ -425,5 +535,6 @@ class OrganismFull(Organism):
             children=self.children,
             reproduction_cycle=self.reproduction_cycle,
             parent=self.parent,
+            genome=self.genome,
             organism_id=self.organism_id,)
 
@@ -0,0 +1,138 @@
+import json
+import os
+import time
+import numpy as np
+import common as c
+import organism as o
+
+phases = ['cycle_all', 'mutation', 'purge', 'update_all', 'render']
+active = None
+
+def organism_classes(cls=o.Organism) -> list:
+    classes = [cls]
+    for subclass in cls.__subclasses__():
+        classes.extend(organism_classes(subclass))
+    return classes
+
+def activate(profiler):
+    global active
+    if profiler is not active:
+        tables = {} if profiler is None else profiler.tables
+        for cls in organism_classes():
+            cls.dispatch = tables.get(cls, cls.interpreters)
+            cls.is_traced = cls not in tables
+        active = profiler
+
+class Profiler:
+    def __init__(self, rate: int = 0):
+        self.rate = rate
+        self.counts = [0] * len(c.instruction_chars)
+        self.totals = [0] * len(c.instruction_chars)
+        self.phase_counts = {name: 0 for name in phases}
+        self.phase_totals = {name: 0 for name in phases}
+        self.last = time.perf_counter_ns()
+        self.engine = None
+        self.tables = {}
+
+    def timed(self, opcode: int, handler):
+        counts = self.counts
+        totals = self.totals
+        clock = time.perf_counter_ns
+
+        def run(organism):
+            start = clock()
+            result = handler(organism)
+            totals[opcode] += clock() - start
+            counts[opcode] += 1
+            return result
+        return run
+
+    def timed_batch(self, handler):
+        counts = self.counts
+        totals = self.totals
+        clock = time.perf_counter_ns
+        size = len(counts)
+
+        def run(b, g):
+            start = clock()
+            if handler is not None:
+                handler(b, g)
+            elapsed = clock() - start
+            ops = np.bincount(b.ops[g, 0], minlength=size)
+            for opcode in np.flatnonzero(ops):
+                counts[opcode] += int(ops[opcode])
+                totals[opcode] += elapsed * int(ops[opcode]) // len(g)
+        return run
+
+    def install(self):
+        self.tables = {cls: [self.timed(opcode, handler) for opcode, handler in enumerate(cls.interpreters)]
+                       for cls in organism_classes()}
+
+    def uninstall(self):
+        self.tables = {}
+        if active is self:
+            activate(None)
+        self.attach(None)
+
+    def attach(self, engine):
+        if self.engine is not None:
+            self.engine.dispatch = self.dispatch
+        self.engine = None
+        if engine is not None and hasattr(engine, 'dispatch'):
+            self.engine = engine
+            self.dispatch = engine.dispatch
+            engine.dispatch = [self.timed_batch(handler) for handler in self.dispatch]
+
+    def mark(self):
+        self.last = time.perf_counter_ns()
+
+    def lap(self, phase: str):
+        now = time.perf_counter_ns()
+        self.phase_totals[phase] += now - self.last
+        self.phase_counts[phase] += 1
+        self.last = now
+
+    def report(self, cycle: int) -> dict:
+        opcodes = {}
+        for opcode, char in enumerate(c.instruction_chars):
+            count = self.counts[opcode]
+            opcodes[char] = {
+                'handler': c.instruction_handlers[opcode],
+                'count': count,
+                'total_ms': self.totals[opcode] / 1e6,
+                'mean_ns': self.totals[opcode] / count if count else 0.0}
+        return {
+            'cycle': cycle,
+            'engine': c.config['engine'] if c.config['workers'] <= 1 else 'tiled',
+            'opcodes': opcodes,
+            'phases': {name: {
+                'count': self.phase_counts[name],
+                'total_ms': self.phase_totals[name] / 1e6,
+                'mean_us': self.phase_totals[name] / self.phase_counts[name] / 1e3 if self.phase_counts[name] else 0.0}
+                for name in phases}}
+
+    def dump(self, filename: str, cycle: int):
+        try:
+            os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+            partial = filename + '.partial'
+            with open(partial, 'w') as f:
+                json.dump(self.report(cycle), f, indent=2)
+            os.replace(partial, filename)
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+
+    def is_dump_due(self, cycle: int) -> bool:
+        return bool(self.rate) and cycle % self.rate == 0
+
+    def summary(self, top: int = 3) -> str:
+        text = ''
+        for name in phases:
+            if self.phase_counts[name]:
+                text += '{:<11}: {:.1f}us\n'.format(name[:11], self.phase_totals[name] / self.phase_counts[name] / 1e3)
+        total = sum(self.totals)
+        ranked = sorted(range(len(self.totals)), key=lambda opcode: self.totals[opcode], reverse=True)
+        for opcode in ranked[:top]:
+            if self.counts[opcode]:
+                text += 'Op {:<7} : {:.0%} {}x\n'.format(
+                    c.instruction_chars[opcode], self.totals[opcode] / total, self.counts[opcode])
+        return text
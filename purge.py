@@ -0,0 +1,33 @@
+import numpy as np
+
+def errors(organisms):
+    return np.fromiter((organism.errors for organism in organisms), dtype=np.int64, count=len(organisms))
+
+def oldest(organisms):
+    return -np.fromiter((organism.organism_id for organism in organisms), dtype=np.int64, count=len(organisms))
+
+def footprint(organisms):
+    sizes = np.array([organism.size for organism in organisms], dtype=np.int64).reshape(-1, 2)
+    child_sizes = np.array([organism.child_size for organism in organisms], dtype=np.int64).reshape(-1, 2)
+    return sizes.prod(axis=1) + child_sizes.prod(axis=1)
+
+def childless(organisms):
+    return np.fromiter((organism.reproduction_cycle for organism in organisms), dtype=np.int64,
+                       count=len(organisms))
+
+policies = {
+    'errors': errors,
+    'oldest': oldest,
+    'largest': footprint,
+    'childless': childless}
+
+def largest(scores, count):
+    if count >= len(scores):
+        return np.arange(len(scores))
+    threshold = np.partition(scores, len(scores) - count)[len(scores) - count]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:count - len(above)]
+    return np.concatenate([above, ties])
+
+def select(organisms, count, policy='errors'):
+    return largest(policies[policy](organisms), count)
@@ -1,18 +1,17 @@
+import numpy as np
 import pygame
 import sys
+import time
+import common as c
+import memory as m
 
-class InfoWindow:
-    def __init__(self):
-        self.text = ""
-    
-    def erase(self):
-        self.text = ""
-    
-    def print(self, text):
-        self.text = text
-    
-    def get_text(self):
-        return self.text
+overlay_codes = {
+    'parent_bold': 27,
+    'parent': 33,
+    'child_bold': 117,
+    'child': 126,
+    'ip_bold': 160,
+    'ip': 128}
 
 class PygameVisualizer:
     def __init__(self, memory, queue, config):
@@ -37,34 +36,103 @@ class PygameVisualizer:
             160: (215, 0, 0),
             'bg': (0, 0, 0),
             'text': (200, 200, 200),}
+        self.palette = np.array([self.colors.get(ord(char), self.colors['bg']) for char in c.instruction_chars],
+                                dtype=np.uint8)
+        self.overlay_colors = {name: np.array(self.colors[overlay_codes[name]], dtype=np.uint16) for name in c.colors}
+        self.view = (mem_display_h, mem_display_w)
+        self.pixels = np.zeros((mem_display_h, mem_display_w, 3), dtype=np.uint8)
+        self.surface = pygame.Surface((mem_display_w, mem_display_h))
+        self.scaled = pygame.Surface((mem_display_w * self.cell_size, mem_display_h * self.cell_size))
+        self.view_key = None
+        self.ip_cells = []
         self.clock = pygame.time.Clock()
         self.is_running = False
+        self.is_fast = False
+        self.target_cps = config.get('target_cps', 50)
+        self.frame_rate = config.get('frame_rate', 50)
+        self.owed = 0.0
+        self.render_time = 0.0
+        self.caller = None
+        self.cycles_per_second = 0.0
+        self.frames_per_second = 0.0
+        self.counted_cycles = 0
+        self.counted_frames = 0
+        self.meter_start = time.perf_counter()
         self.offset_x = 0
         self.offset_y = 0
-        self.info_window = InfoWindow()
+        self.info_window = c.InfoWindow()
+        self.info_lines = []
 
     def draw_memory(self):
+        self.render()
+        self.screen.blit(self.scaled, (0, 0))
+
+    def render(self):
         grid = self.memory.get_grid()
         h, w = grid.shape
-        mem_display_h, mem_display_w = self.config.get('memory_display_size', [200, 200])
-        for y in range(mem_display_h):
-            for x in range(mem_display_w):
-                grid_y = y + self.offset_y
-                grid_x = x + self.offset_x
-                if 0 <= grid_y < h and 0 <= grid_x < w:
-                    val = ord(grid[grid_y, grid_x]) if isinstance(grid[grid_y, grid_x], str) else grid[grid_y, grid_x]
-                    col = self.colors.get(val, self.colors['bg'])
-                    rect = pygame.Rect(x * self.cell_size, y * self.cell_size, self.cell_size, self.cell_size)
-                    pygame.draw.rect(self.screen, col, rect)
+        view_h, view_w = self.view
+        y0, x0 = self.offset_y, self.offset_x
+        y1, x1 = min(y0 + view_h, h), min(x0 + view_w, w)
+        organisms = self.queue.view(y0, x0, y1, x1)
+        ip_cells = [(int(organism.ip[0]), int(organism.ip[1]), organism.is_selected) for organism in organisms
+                    if self.memory.is_allocated(organism.ip)]
+        view_key = (y0, x0, id(self.memory), tuple(organism.organism_id for organism in organisms if organism.is_selected))
+        tiles = self.memory.take_dirty()
+        if view_key != self.view_key:
+            self.view_key = view_key
+            tiles[...] = True
+            self.pixels[...] = self.colors['bg']
+        for y, x, _ in self.ip_cells + ip_cells:
+            tiles[y // m.dirty_tile, x // m.dirty_tile] = True
+        self.ip_cells = ip_cells
+        if y1 <= y0 or x1 <= x0 or not tiles.any():
+            return
+        ty, tx = y0 // m.dirty_tile, x0 // m.dirty_tile
+        visible = tiles[ty:(y1 - 1) // m.dirty_tile + 1, tx:(x1 - 1) // m.dirty_tile + 1]
+        cells = np.repeat(np.repeat(visible, m.dirty_tile, axis=0), m.dirty_tile, axis=1)
+        redraw = cells[y0 - ty * m.dirty_tile:y1 - ty * m.dirty_tile, x0 - tx * m.dirty_tile:x1 - tx * m.dirty_tile]
+        if not redraw.any():
+            return
+        pixels = self.pixels[:y1 - y0, :x1 - x0]
+        pixels[redraw] = self.palette[grid[y0:y1, x0:x1][redraw]]
+        for organism in organisms:
+            suffix = '_bold' if organism.is_selected else ''
+            self.blend(pixels, redraw, organism.start, organism.size, self.overlay_colors['parent' + suffix])
+            self.blend(pixels, redraw, organism.child_start, organism.child_size, self.overlay_colors['child' + suffix])
+        for y, x, is_selected in ip_cells:
+            if y0 <= y < y1 and x0 <= x < x1 and redraw[y - y0, x - x0]:
+                pixels[y - y0, x - x0] = self.overlay_colors['ip_bold' if is_selected else 'ip']
+        pygame.surfarray.blit_array(self.surface, self.pixels.swapaxes(0, 1))
+        pygame.transform.scale(self.surface, self.scaled.get_size(), self.scaled)
+
+    def blend(self, pixels, redraw, start, size, color):
+        top = max(int(start[0]) - self.offset_y, 0)
+        left = max(int(start[1]) - self.offset_x, 0)
+        bottom = min(int(start[0] + size[0]) - self.offset_y, pixels.shape[0])
+        right = min(int(start[1] + size[1]) - self.offset_x, pixels.shape[1])
+        if bottom <= top or right <= left:
+            return
+        mask = redraw[top:bottom, left:right]
+        if mask.any():
+            region = pixels[top:bottom, left:right]
+            region[mask] = (region[mask] + color) // 2
 
     def draw_info(self):
         info_text = self.info_window.get_text()
+        target = 'max' if self.is_fast or not self.target_cps else self.target_cps
+        info_text += 'Speed      : {:.0f}/{} cycles/s\n'.format(self.cycles_per_second, target)
+        info_text += 'Frames     : {:.0f} fps\n'.format(self.frames_per_second)
+        if self.caller is not None and self.caller.profiler is not None:
+            info_text += self.caller.profiler.summary()
         if info_text:
             start_x = self.config.get('memory_display_size', [200, 200])[1] * self.cell_size + 5
             y = 5
-            for line in info_text.splitlines():
-                surf = self.font.render(line, False, self.colors['text'])
-                self.screen.blit(surf, (start_x, y))
+            for i, line in enumerate(info_text.splitlines()):
+                if i == len(self.info_lines):
+                    self.info_lines.append((None, None))
+                if self.info_lines[i][0] != line:
+                    self.info_lines[i] = (line, self.font.render(line, False, self.colors['text']))
+                self.screen.blit(self.info_lines[i][1], (start_x, y))
                 y += self.cell_size * 2 + 2
 
     def handle_events(self):
@@ -79,6 +147,12 @@ class PygameVisualizer:
                 key = ev.key
                 if key == pygame.K_SPACE:
                     self.is_running = not self.is_running
+                if key == pygame.K_f:
+                    self.is_fast = not self.is_fast
+                if key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS) and self.target_cps:
+                    self.target_cps *= 2
+                if key in (pygame.K_MINUS, pygame.K_KP_MINUS) and self.target_cps > 1:
+                    self.target_cps //= 2
                 if key == pygame.K_m:
                     self.caller.toogle_minimal()
                 if key == pygame.K_p:
@@ -96,28 +170,56 @@ class PygameVisualizer:
                         self.offset_y = min(max(0, grid_h - mem_display_h), self.offset_y + scroll_step)
                     if key == pygame.K_d:
                         self.queue.select_next()
-                        if hasattr(self.caller, 'update_info'):
-                            self.caller.update_info()
                     if key == pygame.K_a:
                         self.queue.select_previous()
-                        if hasattr(self.caller, 'update_info'):
-                            self.caller.update_info()
                 if not self.is_running and key == pygame.K_c:
-                    self.queue.cycle_all()
-                    if hasattr(self.caller, 'make_cycle'):
-                        self.caller.make_cycle()
+                    self.caller.step()
+
+    def advance(self, deadline, elapsed):
+        if self.is_fast or not self.target_cps:
+            owed = float('inf')
+        else:
+            self.owed = min(self.owed + self.target_cps * elapsed, self.target_cps)
+            owed = self.owed
+        cycles = 0
+        while owed - cycles >= 1 and (cycles == 0 or time.perf_counter() < deadline):
+            self.caller.step()
+            cycles += 1
+        if owed != float('inf'):
+            self.owed -= cycles
+        return cycles
+
+    def measure(self, cycles):
+        self.counted_cycles += cycles
+        self.counted_frames += 1
+        now = time.perf_counter()
+        if now - self.meter_start >= 1.0:
+            self.cycles_per_second = self.counted_cycles / (now - self.meter_start)
+            self.frames_per_second = self.counted_frames / (now - self.meter_start)
+            self.counted_cycles = 0
+            self.counted_frames = 0
+            self.meter_start = now
 
     def main_loop(self, caller):
         self.caller = caller
+        frame_time = 1.0 / self.frame_rate
+        last_frame = time.perf_counter()
         while True:
+            frame_start = time.perf_counter()
+            elapsed, last_frame = frame_start - last_frame, frame_start
             self.handle_events()
+            cycles = 0
             if self.is_running:
-                self.queue.cycle_all()
-                if hasattr(self.caller, 'make_cycle'):
-                    self.caller.make_cycle()
+                cycles = self.advance(frame_start + frame_time - self.render_time, elapsed)
+            render_start = time.perf_counter()
+            if self.caller.profiler is not None:
+                self.caller.profiler.mark()
             self.screen.fill(self.colors['bg'])
             self.draw_memory()
             self.draw_info()
             pygame.display.flip()
-            self.clock.tick(50)
-
+            if self.caller.profiler is not None:
+                self.caller.profiler.lap('render')
+            self.render_time = time.perf_counter() - render_start
+            self.measure(cycles)
+            self.clock.tick(self.frame_rate)
@@ -1,80 +1,204 @@
 import numpy as np
-from copy import copy
 import common as c
+import archive
+import lineage
+import purge
 
 class Queue:
     def __init__(self):
-        self.organisms = []
-        self.archive = []
+        self.slots = []
+        self.dead = 0
+        self.archive = archive.Archive()
+        self.lineage = lineage.Lineage()
         self.index = None
+        self.engine = None
+        self.births = 0
+        self.deaths = {'errors': 0, 'age': 0, 'purge': 0}
+
+    def __len__(self):
+        return len(self.slots) - self.dead
+
+    def __getstate__(self):
+        self.sync()
+        self.compact()
+        state = self.__dict__.copy()
+        state['engine'] = None
+        return state
+
+    def __setstate__(self, state):
+        if 'organisms' in state:
+            state['slots'] = state.pop('organisms')
+            state['dead'] = 0
+            for slot, organism in enumerate(state['slots']):
+                organism.slot = slot
+        state.pop('archived', None)
+        if not isinstance(state.get('archive'), archive.Archive):
+            state['archive'] = archive.Archive()
+        state.setdefault('births', 0)
+        state.setdefault('deaths', {'errors': 0, 'age': 0, 'purge': 0})
+        self.__dict__.update(state)
+        self.engine = None
+        if 'lineage' not in state:
+            self.lineage = lineage.Lineage()
+            for organism in self.slots:
+                if organism is not None:
+                    organism.organism_id = self.lineage.born()
+                    organism.parent = None
+
+    @property
+    def organisms(self):
+        self.compact()
+        return self.slots
+
+    @organisms.setter
+    def organisms(self, organisms):
+        self.slots = list(organisms)
+        self.dead = 0
+        for slot, organism in enumerate(self.slots):
+            organism.slot = slot
+        if self.index is not None and self.index >= len(self.slots):
+            self.index = max(0, len(self.slots) - 1) if self.slots else None
+
+    def sync(self, index=None):
+        if self.engine is not None:
+            self.engine.store(None if index is None else [index])
+
+    def view(self, y0, x0, y1, x1):
+        if self.engine is not None and hasattr(self.engine, 'view'):
+            return self.engine.view(y0, x0, y1, x1)
+        self.sync()
+        return [organism for organism in self.slots if organism is not None]
 
     def add_organism(self, organism):
-        self.organisms.append(organism)
+        organism.slot = len(self.slots)
+        self.slots.append(organism)
         if self.index is None:
-            self.index = 0
-            self.organisms[self.index].is_selected = True
+            self.index = organism.slot
+            organism.is_selected = True
+
+    def remove(self, organism):
+        slot = getattr(organism, 'slot', None)
+        if slot is not None and slot < len(self.slots) and self.slots[slot] is organism:
+            self.slots[slot] = None
+            self.dead += 1
+            organism.slot = None
+
+    def compact(self):
+        if not self.dead:
+            return
+        if self.index is not None:
+            self.index = sum(1 for organism in self.slots[:self.index] if organism is not None)
+        self.slots[:] = [organism for organism in self.slots if organism is not None]
+        self.dead = 0
+        for slot, organism in enumerate(self.slots):
+            organism.slot = slot
+        if self.index is not None:
+            if self.slots:
+                self.index = min(self.index, len(self.slots) - 1)
+                self.slots[self.index].is_selected = True
+            else:
+                self.index = None
+
+    def take_events(self):
+        births, deaths = self.births, self.deaths
+        self.births = 0
+        self.deaths = dict.fromkeys(deaths, 0)
+        return births, deaths
+
+    def record_death(self, organism_id, cause):
+        self.deaths[cause] += 1
+        self.lineage.died(organism_id, cause)
+
+    def add_events(self, births, deaths):
+        self.births += births
+        for cause, count in deaths.items():
+            self.deaths[cause] += count
 
     def get_organism(self):
-        try:
-            return self.organisms[self.index]
-        except (IndexError, TypeError):
-            if not self.organisms:
+        index = self.index
+        if index is None or index >= len(self.slots) or self.slots[index] is None:
+            self.compact()
+            if not self.slots:
                 raise Exception('No more organisms alive!')
-            return self.organisms[0]
+            index = self.index if self.index is not None else 0
+        self.sync(index)
+        if self.index is not None and self.index < len(self.slots):
+            index = self.index
+        if index >= len(self.slots):
+            raise Exception('No more organisms alive!')
+        return self.slots[index]
+
+    def select(self, index):
+        self.sync()
+        self.slots[self.index].is_selected = False
+        self.slots[self.index].update()
+        self.index = index
+        self.slots[self.index].is_selected = True
+        self.slots[self.index].update()
 
     def select_next(self):
-        if self.index is not None and self.index + 1 < len(self.organisms):
-            self.organisms[self.index].is_selected = False
-            self.organisms[self.index].update()
-            self.index += 1
-            self.organisms[self.index].is_selected = True
-            self.organisms[self.index].update()
+        self.compact()
+        if self.index is not None and self.index + 1 < len(self.slots):
+            self.select(self.index + 1)
 
     def select_previous(self):
+        self.compact()
         if self.index is not None and self.index - 1 >= 0:
-            self.organisms[self.index].is_selected = False
-            self.organisms[self.index].update()
-            self.index -= 1
-            self.organisms[self.index].is_selected = True
-            self.organisms[self.index].update()
+            self.select(self.index - 1)
 
     def cycle_all(self):
-        for organism in copy(self.organisms):
-            organism.cycle()
+        if self.engine is not None:
+            self.engine.cycle_all()
+            return
+        slots = self.slots
+        for slot in range(len(slots)):
+            organism = slots[slot]
+            if organism is not None:
+                organism.cycle()
+        if self.dead * 4 > len(slots):
+            self.compact()
 
     def kill_organisms(self):
-        if not self.organisms:
+        self.sync()
+        organisms = self.organisms
+        if not organisms:
             return
-        sorted_organisms = sorted(self.organisms, reverse=True)
-        ratio = max(1, int(len(self.organisms) * c.config['kill_organisms_ratio']))
-        for organism in sorted_organisms[:ratio]:
+        count = max(1, int(len(organisms) * c.config['kill_organisms_ratio']))
+        for i in purge.select(organisms, count, c.config['kill_policy']).tolist():
+            organism = organisms[i]
             organism.kill()
-        self.organisms = sorted_organisms[ratio:]
-        if self.index is not None and self.index >= len(self.organisms):
-            self.index = max(0, len(self.organisms) - 1) if self.organisms else None
+            self.remove(organism)
+            self.record_death(organism.organism_id, 'purge')
+        self.compact()
 
     def update_all(self):
-        for organism in copy(self.organisms):
-            organism.update()
+        self.sync()
+        for organism in self.slots:
+            if organism is not None:
+                organism.update()
 
     def toogle_minimal(self):
+        self.sync()
         organisms = self.organisms
+        index = self.index
         self.organisms = []
+        self.index = index
         for organism in organisms:
-            organism.toogle()
+            organism.toggle()
 
     def info_text(self, cycle, purges):
+        self.sync()
         import memory as m
         lines = []
         lines.append(f"[{c.config['simulation_name']}]")
         lines.append(f"Cycle      : {cycle}")
         lines.append(f"Position   : {list(m.memory.position)}")
-        lines.append(f"Total      : {len(self.organisms)}")
+        lines.append(f"Total      : {len(self)}")
         lines.append(f"Purges     : {purges}")
         lines.append(f"Organism   : {self.index}")
-        if self.organisms:
+        if len(self):
             lines.append(self.get_organism().info())
         return "\n".join(lines)
 
-queue = Queue()
+queue = None
 
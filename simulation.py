@@ -0,0 +1,305 @@
+import numpy as np
+import os
+import glob
+import time
+import pickle
+import chunks
+import memory as m
+import queue as q
+import common as c
+import organism as o
+import snapshot
+import mutation
+import profiler
+import metrics
+
+class Simulation:
+    is_minimal = True
+
+    def __init__(self, config=None):
+        self.config = c.load_config(config)
+        c.config = self.config
+        self.profiler = None
+        if self.config['profile']:
+            self.profiler = profiler.Profiler(self.config['profile_rate'])
+            self.profiler.install()
+        self.memory = m.Memory()
+        self.queue = q.Queue()
+        self.activate()
+        self.writer = snapshot.Writer()
+        self.is_save_due = False
+        seed = self.config['mutation_seed']
+        self.mutations = mutation.Mutations(self.config['random_seed'] if seed is None else seed)
+        self.ensure_initial_genome()
+        genome_size = self.load_genome_into_memory('initial.gen', self.config['memory_size'] // 2)
+        o.OrganismFull(self.config['memory_size'] // 2, genome_size)
+        self.engine = None
+        self.attach_engine()
+        self.cycle = 0
+        self.purges = 0
+        self.recorder = None
+        if self.config['metrics_rate']:
+            self.recorder = metrics.Recorder(self.metrics_directory(), self.config['metrics_rate'])
+        if self.config['snapshot_to_load'] != 'new':
+            self.load_state()
+        if self.recorder is not None:
+            self.recorder.rewind(self.cycle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.writer.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.engine is not None and hasattr(self.engine, 'close'):
+            self.engine.close()
+        if self.profiler is not None:
+            self.profiler.uninstall()
+
+    def activate(self):
+        c.config = self.config
+        m.memory = self.memory
+        q.queue = self.queue
+        profiler.activate(self.profiler)
+
+    def ensure_initial_genome(self):
+        if not os.path.exists('initial.gen'):
+            genome = [
+                "v$<...vdc@<>..@cd>Sb.v.",
+                ">....v>Sbv^^b?bP<......",
+                "..b......>...........v.",
+                "va0aS<>....>..?d^>?avv.",
+                ">1d::.^a-a-a-ax-..a&<..",
+                ".v.<cS.dSaSbdWbaL<vc?<<",
+                "..^..a+aPc0d0<>..^>..v.",
+                ".>v.>..+yd?yc^^.>...v&.",
+                "v<..^ay+cy-.aPdP..cP<b.",
+                "@..^.bdWbaL....<^cx?<..",
+                "c.>.+xa+xd-xc.......^:.",
+                "d^<.vd0.....cab~b+by+<.",
+                ">v.vb-b0bP<^b?b-..<.<..",
+                "d..S>PbSb?b^>-b?bv^.^..",
+                "c.^b.............<.....",
+                "@>...................:^",
+                "^..<..................."]
+            with open('initial.gen', 'w') as f:
+                for line in genome:
+                    f.write(line + '\n')
+            print("Created initial.gen with large genome")
+
+    def attach_engine(self):
+        if self.engine is not None and hasattr(self.engine, 'close'):
+            self.engine.close()
+        self.engine = None
+        self.memory.mutations = self.mutations
+        workers = self.config['workers']
+        if workers > 1 and chunks.is_chunked(self.memory.memory_map):
+            print("Error starting workers: tiled engine needs the dense memory backend")
+            workers = 0
+        if workers > 1:
+            from tiling import TiledEngine
+            self.engine = TiledEngine(self.queue, workers)
+        elif self.config['engine'] == 'vector':
+            from vector_engine import VectorEngine
+            self.engine = VectorEngine(self.queue)
+        self.queue.engine = self.engine
+        if self.profiler is not None:
+            self.profiler.attach(self.engine)
+
+    def run(self):
+        self.run_headless()
+
+    def run_headless(self):
+        self.activate()
+        max_cycles = self.config['max_cycles']
+        time_limit = self.config['time_limit']
+        snapshot_rate = self.config['snapshot_rate']
+        stats_rate = self.config['stats_rate']
+        start_cycle = self.cycle
+        start_time = time.time()
+        snapshot = None
+        while len(self.queue):
+            if max_cycles is not None and self.cycle - start_cycle >= max_cycles:
+                break
+            if time_limit is not None and time.time() - start_time >= time_limit:
+                break
+            self.step()
+            if snapshot_rate and self.cycle % snapshot_rate == 0:
+                snapshot = self.save_state()
+            if stats_rate and self.cycle % stats_rate == 0:
+                self.write_stats(start_cycle, start_time)
+        if stats_rate and self.cycle % stats_rate:
+            self.write_stats(start_cycle, start_time)
+        if self.recorder is not None and not self.recorder.is_sample_due(self.cycle):
+            self.recorder.sample(self.cycle, self.memory, self.queue)
+        elapsed = time.time() - start_time
+        cycles = self.cycle - start_cycle
+        self.writer.flush()
+        if self.recorder is not None:
+            self.recorder.flush()
+        self.queue.sync()
+        if self.profiler is not None:
+            self.write_profile()
+        print('[{}] finished'.format(self.config['simulation_name']))
+        print('Cycles     : {}'.format(cycles))
+        print('Elapsed    : {:.2f}s'.format(elapsed))
+        print('Speed      : {:.1f} cycles/s'.format(cycles / elapsed if elapsed > 0 else 0.0))
+        print('Total      : {}'.format(len(self.queue)))
+        print('Purges     : {}'.format(self.purges))
+        if snapshot is not None:
+            print('Snapshot   : {}'.format(snapshot))
+        if self.profiler is not None:
+            print('Profile    : {}'.format(self.profile_filename()))
+
+    def write_stats(self, start_cycle, start_time):
+        try:
+            os.makedirs('stats', exist_ok=True)
+            filename = 'stats/{}.csv'.format(self.config['simulation_name'].lower().replace(' ', '_'))
+            is_new = not os.path.exists(filename)
+            elapsed = time.time() - start_time
+            self.queue.sync()
+            with open(filename, 'a') as f:
+                if is_new:
+                    f.write('cycle,organisms,purges,memory_used,cycles_per_second\n')
+                f.write('{},{},{},{:.4f},{:.1f}\n'.format(
+                    self.cycle,
+                    len(self.queue),
+                    self.purges,
+                    self.memory.used / self.memory.allocation_map.size,
+                    (self.cycle - start_cycle) / elapsed if elapsed > 0 else 0.0))
+        except Exception as e:
+            print(f"Error writing stats: {e}")
+
+    def metrics_directory(self):
+        return 'metrics/{}'.format(self.config['simulation_name'].lower().replace(' ', '_'))
+
+    def profile_filename(self):
+        return 'profiles/{}.json'.format(self.config['simulation_name'].lower().replace(' ', '_'))
+
+    def write_profile(self):
+        self.profiler.dump(self.profile_filename(), self.cycle)
+
+    def load_genome_into_memory(self, filename: str, address: np.array) -> np.array:
+        try:
+            with open(filename) as genome_file:
+                lines = [line.strip() for line in genome_file if line.strip()]
+                max_width = max(len(line) for line in lines) if lines else 1
+                genome = np.full((len(lines), max_width), '.', dtype=str)
+                for i, line in enumerate(lines):
+                    for j, char in enumerate(line):
+                        genome[i, j] = char
+            self.memory.load_genome(genome, address, genome.shape)
+            print(f"Loaded genome of size {genome.shape} at position {address}")
+            return genome.shape
+        except Exception as e:
+            print(f"Error loading genome: {e}")
+            genome = np.array([['1', 'a'], ['^', '.']], dtype=str)
+            self.memory.load_genome(genome, address, genome.shape)
+            return genome.shape
+
+    def counters(self) -> dict:
+        return {'cycle': self.cycle, 'organisms': len(self.queue), 'purges': self.purges, 'selected': self.queue.index}
+
+    def request_save(self):
+        self.is_save_due = True
+
+    def save_state(self):
+        try:
+            os.makedirs('snapshots', exist_ok=True)
+            prefix = 'snapshots/{}_cycle_'.format(self.config['simulation_name'].lower().replace(' ', '_'))
+            filename = '{}{}.snapshot'.format(prefix, self.cycle)
+            meta, arrays = snapshot.capture(
+                self.cycle, self.purges, self.memory, self.queue, archive=self.config['snapshot_archive'])
+            self.writer.submit(
+                filename, meta, arrays,
+                compress=self.config['snapshot_compression'],
+                rotation=(glob.escape(prefix) + '*.snapshot', self.config['snapshot_keep']))
+            return filename
+        except Exception as e:
+            print(f"Error saving state: {e}")
+
+    def load_state(self):
+        try:
+            self.activate()
+            if self.config['snapshot_to_load'] in ('last', 'new'):
+                snapshots = glob.glob('snapshots/*.snapshot')
+                if snapshots:
+                    filename = max(snapshots, key=os.path.getctime)
+                else:
+                    return
+            else:
+                filename = self.config['snapshot_to_load']
+            if snapshot.is_snapshot(filename):
+                state = snapshot.load(filename)
+            else:
+                with open(filename, 'rb') as f:
+                    state = pickle.load(f)
+            self.memory = state['memory']
+            self.queue = state['queue']
+            self.activate()
+            self.cycle = state['cycle']
+            self.purges = state.get('purges', 0)
+            self.queue.archive.cycle = self.cycle
+            self.queue.lineage.cycle = self.cycle
+            if state.get('mutations'):
+                self.mutations.restore(state['mutations'])
+            self.attach_engine()
+            if self.recorder is not None:
+                self.recorder.rewind(self.cycle)
+        except Exception as e:
+            print(f"Error loading state: {e}")
+
+    def step(self):
+        self.activate()
+        if self.profiler is None:
+            self.queue.cycle_all()
+        else:
+            self.profiler.mark()
+            self.queue.cycle_all()
+            self.profiler.lap('cycle_all')
+        self.make_cycle()
+
+    def make_cycle(self):
+        try:
+            profiler = self.profiler
+            if profiler is not None:
+                profiler.mark()
+            self.mutations.step(self.memory, self.cycle)
+            if profiler is not None:
+                profiler.lap('mutation')
+            if self.cycle % self.config['cycle_gap'] == 0 and self.memory.is_time_to_kill():
+                self.queue.kill_organisms()
+                self.purges += 1
+                if profiler is not None:
+                    profiler.lap('purge')
+            if not self.is_minimal:
+                if profiler is not None:
+                    profiler.mark()
+                self.queue.update_all()
+                if profiler is not None:
+                    profiler.lap('update_all')
+            self.cycle += 1
+            self.queue.archive.cycle = self.cycle
+            self.queue.lineage.cycle = self.cycle
+            if self.recorder is not None and self.recorder.is_sample_due(self.cycle):
+                self.recorder.sample(self.cycle, self.memory, self.queue)
+            if profiler is not None and profiler.is_dump_due(self.cycle):
+                self.write_profile()
+            if self.is_save_due:
+                self.is_save_due = False
+                self.save_state()
+        except Exception as e:
+            print(f"Error in make_cycle: {e}")
+
+    def run_cycles(self, cycles: int) -> int:
+        self.activate()
+        for _ in range(cycles):
+            if not len(self.queue):
+                break
+            self.step()
+        self.queue.sync()
+        return self.cycle
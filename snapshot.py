@@ -0,0 +1,207 @@
+import atexit
+import glob
+import json
+import os
+import struct
+import zlib
+from collections import deque
+from threading import Thread, Condition
+import numpy as np
+import chunks
+import common as c
+import memory as m
+import queue as q
+import organism as o
+import lineage
+
+magic = b'FUNGERA\x00'
+version = 3
+preamble = struct.Struct('<8sII')
+alignment = 64
+
+def align(offset: int) -> int:
+    return -(-offset // alignment) * alignment
+
+def is_snapshot(filename: str) -> bool:
+    with open(filename, 'rb') as f:
+        return f.read(len(magic)) == magic
+
+def capture(cycle: int, purges: int, memory, queue, archive=True):
+    queue.sync()
+    arrays = {}
+    for name in ('memory_map', 'allocation_map'):
+        grid = getattr(memory, name)
+        if chunks.is_chunked(grid):
+            for key, column in grid.pack().items():
+                arrays[name + '/' + key] = column
+        else:
+            arrays[name] = np.array(grid)
+    for key, column in o.pack(queue.organisms).items():
+        arrays['organisms/' + key] = column
+    for key, column in queue.lineage.pack().items():
+        arrays['lineage/' + key] = column
+    if archive:
+        for key, column in queue.archive.pack().items():
+            arrays['archive/' + key] = column
+    meta = {
+        'cycle': cycle,
+        'purges': purges,
+        'position': [int(value) for value in np.ravel(memory.position)],
+        'index': queue.index,
+        'archive': archive}
+    if memory.mutations is not None:
+        meta['mutations'] = memory.mutations.state()
+    return meta, arrays
+
+def write(filename: str, meta: dict, arrays: dict, compress=False):
+    specs = {}
+    blobs = []
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if compress:
+            blob = zlib.compress(array.tobytes(), 6)
+        else:
+            blob = memoryview(array).cast('B') if array.size else b''
+        specs[name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+            'length': len(blob),
+            'compressed': compress}
+        blobs.append((offset, blob))
+        offset = align(offset + len(blob))
+    header = json.dumps({'meta': meta, 'arrays': specs}).encode()
+    data_start = align(preamble.size + len(header))
+    partial = filename + '.partial'
+    with open(partial, 'wb') as f:
+        f.write(preamble.pack(magic, version, len(header)))
+        f.write(header)
+        for offset, blob in blobs:
+            f.seek(data_start + offset)
+            f.write(blob)
+    os.replace(partial, filename)
+
+def save(filename: str, cycle: int, purges: int, memory, queue, archive=True, compress=False):
+    meta, arrays = capture(cycle, purges, memory, queue, archive)
+    write(filename, meta, arrays, compress)
+
+def rotate(pattern: str, keep: int):
+    if not keep:
+        return
+    snapshots = sorted(glob.glob(pattern), key=os.path.getmtime)
+    for filename in snapshots[:-keep]:
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+class Writer:
+    def __init__(self, capacity=2):
+        self.capacity = capacity
+        self.jobs = deque()
+        self.condition = Condition()
+        self.is_busy = False
+        self.is_stopped = False
+        self.skipped = 0
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, filename: str, meta: dict, arrays: dict, compress=False, rotation=None):
+        with self.condition:
+            while len(self.jobs) >= self.capacity:
+                self.skipped += 1
+                print("Skipped snapshot {} ({} skipped so far)".format(self.jobs.popleft()[0], self.skipped))
+            self.jobs.append((filename, meta, arrays, compress, rotation))
+            self.condition.notify_all()
+
+    def flush(self):
+        with self.condition:
+            while self.jobs or self.is_busy:
+                self.condition.wait()
+
+    def close(self):
+        self.flush()
+        with self.condition:
+            self.is_stopped = True
+            self.condition.notify_all()
+        self.thread.join()
+        atexit.unregister(self.flush)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.jobs and not self.is_stopped:
+                    self.condition.wait()
+                if not self.jobs:
+                    return
+                filename, meta, arrays, compress, rotation = self.jobs.popleft()
+                self.is_busy = True
+                self.condition.notify_all()
+            try:
+                write(filename, meta, arrays, compress)
+                if rotation is not None:
+                    rotate(*rotation)
+            except Exception as e:
+                print(f"Error writing snapshot: {e}")
+            finally:
+                with self.condition:
+                    self.is_busy = False
+                    self.condition.notify_all()
+
+def read(filename: str, mmap=True):
+    with open(filename, 'rb') as f:
+        tag, file_version, header_length = preamble.unpack(f.read(preamble.size))
+        if tag != magic:
+            raise ValueError('{} is not a snapshot'.format(filename))
+        if file_version > version:
+            raise ValueError('Snapshot version {} is newer than supported version {}'.format(file_version, version))
+        header = json.loads(f.read(header_length))
+        data_start = align(preamble.size + header_length)
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            shape = tuple(spec['shape'])
+            if spec['compressed']:
+                f.seek(data_start + spec['offset'])
+                array = np.frombuffer(zlib.decompress(f.read(spec['length'])), dtype=dtype).reshape(shape).copy()
+            elif mmap and spec['length']:
+                array = np.memmap(filename, dtype=dtype, mode='c', offset=data_start + spec['offset'], shape=shape)
+            else:
+                f.seek(data_start + spec['offset'])
+                array = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+            arrays[name] = array
+    return header['meta'], arrays
+
+def section(arrays: dict, name: str) -> dict:
+    prefix = name + '/'
+    return {key[len(prefix):]: array for key, array in arrays.items() if key.startswith(prefix)}
+
+def load(filename: str, mmap=True) -> dict:
+    meta, arrays = read(filename, mmap)
+    maps = {}
+    for name in ('memory_map', 'allocation_map'):
+        if name in arrays:
+            maps[name] = arrays[name]
+        else:
+            maps[name] = chunks.ChunkedGrid.unpack(section(arrays, name), c.config['memory_directory'])
+    memory = m.Memory(
+        memory_map=maps['memory_map'],
+        allocation_map=maps['allocation_map'],
+        position=np.array(meta['position']))
+    queue = q.Queue()
+    organisms = section(arrays, 'organisms')
+    if 'lineage/parent' in arrays:
+        queue.lineage = lineage.Lineage.unpack(section(arrays, 'lineage'), meta['cycle'])
+    else:
+        queue.lineage.cycle = meta['cycle']
+        organisms['organism_id'] = np.array([queue.lineage.born() for _ in organisms['ip']], dtype=np.int64)
+        organisms['parent'] = np.full(len(organisms['ip']), -1)
+    queue.organisms = o.unpack(organisms)
+    queue.index = meta['index'] if len(queue) else None
+    queue.archive.cycle = meta['cycle']
+    if meta['archive'] and 'archive/hash' in arrays:
+        queue.archive.attach(section(arrays, 'archive'))
+    return {'cycle': meta['cycle'], 'purges': meta['purges'], 'memory': memory, 'queue': queue,
+            'mutations': meta.get('mutations')}
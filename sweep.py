@@ -0,0 +1,142 @@
+import argparse
+import csv
+import glob
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+fungera = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fungera.py')
+metrics = ['cycle', 'organisms', 'purges', 'memory_used', 'cycles_per_second']
+
+def parse_grid(items) -> dict:
+    grid = {}
+    for item in items:
+        key, _, values = item.partition('=')
+        if values.startswith('['):
+            grid[key] = [json.dumps(value) for value in json.loads(values)]
+        else:
+            grid[key] = values.split(',')
+    return grid
+
+def expand(grid: dict) -> list:
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+def run_name(index: int) -> str:
+    return 'run_{:04d}'.format(index)
+
+def last_snapshot(name: str):
+    snapshots = []
+    for filename in glob.glob('snapshots/{}_cycle_*.snapshot'.format(name)):
+        match = re.search(r'_cycle_(\d+)\.snapshot$', filename)
+        if match:
+            snapshots.append((int(match.group(1)), filename))
+    return max(snapshots) if snapshots else (0, None)
+
+def trim_stats(name: str, cycle: int):
+    filename = 'stats/{}.csv'.format(name)
+    if not os.path.exists(filename):
+        return
+    with open(filename) as f:
+        rows = list(csv.reader(f))
+    kept = rows[:1] + [row for row in rows[1:] if row and int(row[0]) <= cycle]
+    with open(filename, 'w', newline='') as f:
+        csv.writer(f).writerows(kept)
+
+def read_metrics(name: str) -> dict:
+    filename = 'stats/{}.csv'.format(name)
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        rows = list(csv.DictReader(f))
+    return rows[-1] if rows else {}
+
+def command(name: str, params: dict, args, extra: list):
+    cycle, snapshot = last_snapshot(name)
+    if snapshot is None:
+        trim_stats(name, -1)
+    else:
+        trim_stats(name, cycle)
+    line = [sys.executable, fungera, '--headless',
+            '--name', name,
+            '--cycles', str(max(args.cycles - cycle, 0)),
+            '--stats-rate', str(args.stats_rate),
+            '--snapshot-rate', str(args.checkpoint_rate),
+            '--keep-snapshots', '2',
+            '--state', snapshot if snapshot is not None else 'new']
+    for key, value in params.items():
+        line += ['--set', '{}={}'.format(key, value)]
+    return line + extra
+
+def load_results(filename: str) -> dict:
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        return {row['run']: row for row in csv.DictReader(f) if row['returncode'] == '0'}
+
+def write_results(filename: str, rows: list, keys: list):
+    with open(filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['run'] + keys + ['returncode', 'seconds'] + metrics)
+        writer.writeheader()
+        for row in sorted(rows, key=lambda row: row['run']):
+            writer.writerow(row)
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a grid of headless Fungera simulations')
+    parser.add_argument('--grid', action='append', default=[], metavar='KEY=V1,V2',
+                        help='Config values to sweep (repeatable; a JSON list is also accepted)')
+    parser.add_argument('--cycles', type=int, default=100000, help='Cycles per run')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Simulations run at once')
+    parser.add_argument('--out', default='sweeps/sweep', help='Sweep directory')
+    parser.add_argument('--stats-rate', type=int, default=1000, help='Cycles between metric rows of each run')
+    parser.add_argument('--checkpoint-rate', type=int, default=10000, help='Cycles between run checkpoints (0 disables)')
+    args, extra = parser.parse_known_args()
+    extra = [arg for arg in extra if arg != '--']
+    grid = parse_grid(args.grid)
+    runs = expand(grid)
+    os.makedirs(os.path.join(args.out, 'logs'), exist_ok=True)
+    os.chdir(args.out)
+    spec = {'grid': grid, 'cycles': args.cycles, 'extra': extra}
+    if os.path.exists('sweep.json'):
+        with open('sweep.json') as f:
+            if json.load(f) != spec:
+                sys.exit('{} holds a different sweep; choose another --out'.format(args.out))
+    else:
+        with open('sweep.json', 'w') as f:
+            json.dump(spec, f, indent=2)
+    results = load_results('results.csv')
+    pending = [(run_name(index), params) for index, params in enumerate(runs) if run_name(index) not in results]
+    print('{} runs, {} done, {} pending'.format(len(runs), len(results), len(pending)))
+    running = {}
+    try:
+        while pending or running:
+            while pending and len(running) < args.jobs:
+                name, params = pending.pop(0)
+                log = open('logs/{}.log'.format(name), 'a')
+                process = subprocess.Popen(command(name, params, args, extra), stdout=log, stderr=subprocess.STDOUT)
+                running[name] = (process, params, log, time.time())
+            for name, (process, params, log, started) in list(running.items()):
+                if process.poll() is None:
+                    continue
+                log.close()
+                del running[name]
+                row = {'run': name, 'returncode': process.returncode, 'seconds': round(time.time() - started, 2)}
+                row.update(params)
+                row.update(read_metrics(name))
+                results[name] = row
+                write_results('results.csv', list(results.values()), list(grid))
+                print('{} finished ({}) {}'.format(name, process.returncode, params))
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        for process, _, log, _ in running.values():
+            process.terminate()
+            log.close()
+        sys.exit('Interrupted; run the same command again to resume')
+    print('Results written to {}'.format(os.path.join(args.out, 'results.csv')))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+import atexit
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import common as c
+import memory as m
+import queue as q
+import organism as o
+import lineage
+
+class TileMemory(m.Memory):
+    def __init__(self, memory_map, allocation_map, bounds):
+        super().__init__(memory_map=memory_map, allocation_map=allocation_map)
+        self.bounds = bounds
+        self.journal = []
+
+    def is_owned(self, address: np.array, size: np.array):
+        y0, x0, y1, x1 = self.bounds
+        return (y0 <= address[0] and x0 <= address[1] and
+                address[0] + size[0] <= y1 and address[1] + size[1] <= x1)
+
+    def is_allocated_region(self, address: np.array, size: np.array):
+        is_allocated = super().is_allocated_region(address, size)
+        if is_allocated is False and not self.is_owned(address, size):
+            return True
+        return is_allocated
+
+def partition(shape, workers: int) -> list:
+    rows = max(divisor for divisor in range(1, int(workers ** 0.5) + 1) if workers % divisor == 0)
+    cols = workers // rows
+    row_edges = np.linspace(0, shape[0], rows + 1).astype(int)
+    col_edges = np.linspace(0, shape[1], cols + 1).astype(int)
+    return [(row_edges[i], col_edges[j], row_edges[i + 1], col_edges[j + 1])
+            for i in range(rows) for j in range(cols)]
+
+def share(array: np.ndarray):
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[...] = array
+    return block, shared
+
+def forget(memory, journal):
+    for y, x in journal:
+        memory.forget(y, x)
+
+def overlapping(organisms, bounds):
+    y0, x0, y1, x1 = bounds
+    return [organism for organism in organisms if any(
+        start[0] < y1 and start[1] < x1 and start[0] + size[0] > y0 and start[1] + size[1] > x0
+        for start, size in ((organism.start, organism.size), (organism.child_start, organism.child_size),
+                            (organism.ip, (1, 1))))]
+
+def work(connection, memory_map, allocation_map, bounds, mutations):
+    m.memory = TileMemory(memory_map, allocation_map, bounds)
+    m.memory.mutations = mutations
+    q.queue = q.Queue()
+    q.queue.lineage = lineage.Journal()
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        command = message[0]
+        if command == 'load':
+            q.queue = q.Queue()
+            q.queue.organisms = o.unpack(message[1])
+            q.queue.archive.capacity = 0
+            q.queue.lineage = lineage.Journal()
+            if c.config['engine'] == 'vector':
+                from vector_engine import VectorEngine
+                q.queue.engine = VectorEngine(q.queue)
+            m.memory.template_lines = {}
+            m.memory.traces = {}
+            m.memory.occupancy = None
+        elif command == 'cycle':
+            forget(m.memory, message[1])
+            q.queue.archive.cycle = message[2]
+            used = m.memory.used
+            q.queue.cycle_all()
+            journal, m.memory.journal = m.memory.journal, []
+            connection.send((journal, m.memory.used - used, m.memory.take_dirty(), len(q.queue),
+                             q.queue.take_events(), q.queue.lineage.take()))
+        elif command == 'rename':
+            for organism in q.queue.slots:
+                if organism is not None:
+                    organism.organism_id = message[1].get(organism.organism_id, organism.organism_id)
+                    organism.parent = message[1].get(organism.parent, organism.parent)
+        elif command == 'fetch':
+            q.queue.sync()
+            ids, bounds = message[1:]
+            if ids is not None:
+                organisms = [organism for organism in q.queue.organisms if organism.organism_id in ids]
+            else:
+                organisms = overlapping(q.queue.organisms, bounds)
+            connection.send(o.pack(organisms))
+        elif command == 'store':
+            q.queue.sync()
+            connection.send((o.pack(q.queue.organisms), q.queue.archive.drain()))
+        elif command == 'stop':
+            break
+    connection.close()
+
+class TiledEngine:
+    def __init__(self, queue, workers: int):
+        self.queue = queue
+        self.memory = m.memory
+        self.blocks = []
+        for name in ('memory_map', 'allocation_map'):
+            block, shared = share(getattr(self.memory, name))
+            self.blocks.append(block)
+            setattr(self.memory, name, shared)
+        self.memory.journal = []
+        self.memory.occupancy = None
+        self.tiles = partition(self.memory.memory_map.shape, workers)
+        self.row_edges = np.array(sorted({tile[0] for tile in self.tiles}))
+        self.col_edges = np.array(sorted({tile[1] for tile in self.tiles}))
+        mutations = [None] * len(self.tiles)
+        if self.memory.mutations is not None:
+            mutations = self.memory.mutations.spawn(len(self.tiles))
+        context = multiprocessing.get_context('fork')
+        self.connections = []
+        self.processes = []
+        for bounds, tile_mutations in zip(self.tiles, mutations):
+            connection, child = context.Pipe()
+            process = context.Process(
+                target=work, args=(child, self.memory.memory_map, self.memory.allocation_map, bounds, tile_mutations),
+                daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+        self.journals = [[] for _ in self.tiles]
+        self.layout = None
+        self.count = len(queue)
+        self.is_dirty = False
+        atexit.register(self.close)
+
+    def signature(self):
+        return id(self.queue.slots), len(self.queue.slots), self.queue.dead
+
+    def owners(self, starts: np.ndarray) -> np.ndarray:
+        rows = np.searchsorted(self.row_edges, starts[:, 0], side='right') - 1
+        cols = np.searchsorted(self.col_edges, starts[:, 1], side='right') - 1
+        return np.clip(rows, 0, len(self.row_edges) - 1) * len(self.col_edges) + np.clip(cols, 0, len(self.col_edges) - 1)
+
+    def distribute(self):
+        organisms = self.queue.organisms
+        columns = o.pack(organisms)
+        owners = self.owners(columns['start'])
+        for k, connection in enumerate(self.connections):
+            rows = np.flatnonzero(owners == k)
+            connection.send(('load', {key: column[rows] for key, column in columns.items()}))
+        self.memory.occupancy = None
+        self.layout = self.signature()
+        self.count = len(organisms)
+
+    def cycle_all(self):
+        if self.signature() != self.layout:
+            self.distribute()
+        journal, self.memory.journal = self.memory.journal, []
+        for k, connection in enumerate(self.connections):
+            connection.send(('cycle', self.journals[k] + journal, self.queue.archive.cycle))
+        self.journals = [[] for _ in self.tiles]
+        self.count = 0
+        for k, connection in enumerate(self.connections):
+            journal, used, dirty, count, events, (births, deaths) = connection.recv()
+            self.queue.add_events(*events)
+            for organism_id, cause in deaths:
+                self.queue.lineage.died(organism_id, cause)
+            if births:
+                connection.send(('rename', self.rename(births)))
+            forget(self.memory, journal)
+            self.memory.used += used
+            self.memory.dirty |= dirty
+            self.count += count
+            for other in range(len(self.journals)):
+                if other != k:
+                    self.journals[other].extend(journal)
+        self.memory.occupancy = None
+        self.is_dirty = True
+        if not self.count:
+            self.store()
+
+    def rename(self, births) -> dict:
+        ids = {}
+        for i, parent in enumerate(births):
+            parent = ids.get(parent, parent)
+            ids[-2 - i] = self.queue.lineage.born(parent if parent >= 0 else None)
+        return ids
+
+    def selected(self):
+        slots = self.queue.slots
+        index = self.queue.index
+        return slots[index].organism_id if index is not None and index < len(slots) and slots[index] else None
+
+    def fetch(self, ids=None, bounds=None) -> list:
+        for connection in self.connections:
+            connection.send(('fetch', ids, bounds))
+        organisms = []
+        for connection in self.connections:
+            organisms.extend(o.unpack(connection.recv()))
+        return organisms
+
+    def view(self, y0, x0, y1, x1) -> list:
+        if not self.is_dirty:
+            return [organism for organism in self.queue.slots if organism is not None]
+        selected = self.selected()
+        organisms = self.fetch(bounds=(y0, x0, y1, x1))
+        for organism in organisms:
+            organism.is_selected = organism.organism_id == selected
+        return organisms
+
+    def refresh(self, rows) -> bool:
+        slots = self.queue.slots
+        rows = [i for i in rows if i < len(slots) and slots[i] is not None]
+        if not rows:
+            return False
+        fetched = {organism.organism_id: organism for organism in self.fetch(ids={slots[i].organism_id for i in rows})}
+        if any(slots[i].organism_id not in fetched for i in rows):
+            return False
+        for i in rows:
+            organism = fetched[slots[i].organism_id]
+            organism.slot = i
+            organism.is_selected = slots[i].is_selected
+            slots[i] = organism
+        return True
+
+    def store(self, rows=None):
+        if not self.is_dirty:
+            return
+        if rows is not None and self.refresh(rows):
+            return
+        self.is_dirty = False
+        selected = self.selected()
+        index = self.queue.index
+        for connection in self.connections:
+            connection.send(('store',))
+        organisms = []
+        for connection in self.connections:
+            columns, archived = connection.recv()
+            organisms.extend(o.unpack(columns))
+            self.queue.archive.merge(archived)
+        for organism in organisms:
+            organism.is_selected = organism.organism_id == selected
+        self.queue.organisms = organisms
+        if organisms:
+            index = next((i for i, organism in enumerate(organisms) if organism.is_selected),
+                         min(index or 0, len(organisms) - 1))
+            self.queue.index = index
+            organisms[index].is_selected = True
+        else:
+            self.queue.index = None
+        self.layout = self.signature()
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(('stop',))
+                connection.close()
+            except OSError:
+                pass
+        for process in self.processes:
+            process.join(timeout=1)
+        if self.blocks:
+            for name in ('memory_map', 'allocation_map'):
+                setattr(self.memory, name, np.array(getattr(self.memory, name)))
+        for block in self.blocks:
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+        self.connections = []
+        self.processes = []
+        self.blocks = []
+        atexit.unregister(self.close)
@@ -0,0 +1,408 @@
+import numpy as np
+import common as c
+import memory as m
+import organism as o
+
+chars = c.instruction_chars
+handlers = list(dict.fromkeys(c.instruction_handlers))
+registers = o.RegsDict.allowed_keys
+blank = c.opcodes['.']
+marker = c.opcodes[':']
+op_values = c.instruction_values
+op_handlers = np.array([handlers.index(name) for name in c.instruction_handlers])
+op_regs = np.array([registers.index(char) if char in registers else -1 for char in chars])
+op_mods = np.array([{'x': 0, 'y': 1}.get(char, -1) for char in chars])
+op_deltas = np.array([c.deltas[name[5:]] if name.startswith('move_') else [0, 0] for name in c.instruction_handlers])
+template_reach = 100
+reaches = {
+    'find_template': template_reach,
+    'if_not_zero': 3,
+    'increment': 3,
+    'decrement': 3,
+    'zero': 2,
+    'one': 2,
+    'subtract': 4,
+    'load_inst': 3,
+    'write_inst': 3,
+    'allocate_child': 3,
+    'push': 2,
+    'pop': 2}
+op_reaches = np.array([reaches.get(name, 1) for name in c.instruction_handlers])
+fields = ('ip', 'delta', 'start', 'size', 'regs', 'stack', 'depth', 'errors',
+          'child_size', 'child_start', 'reproduction_cycle', 'children')
+WRITE = 1
+DEATH = 2
+LIVE = 4
+
+class Batch:
+    def __init__(self, **arrays):
+        self.__dict__.update(arrays)
+
+class VectorEngine:
+    def __init__(self, queue):
+        self.queue = queue
+        self.objects = None
+        self.state = self.pack([])
+        self.is_dirty = False
+        self.handlers = {
+            'move_up': self.move,
+            'move_down': self.move,
+            'move_right': self.move,
+            'move_left': self.move,
+            'find_template': self.find_template,
+            'if_not_zero': self.if_not_zero,
+            'one': self.one,
+            'zero': self.zero,
+            'decrement': self.decrement,
+            'increment': self.increment,
+            'subtract': self.subtract,
+            'load_inst': self.load_inst,
+            'write_inst': self.write_inst,
+            'allocate_child': self.live,
+            'split_child': self.live,
+            'push': self.push,
+            'pop': self.pop}
+        self.dispatch = [self.handlers.get(name) for name in handlers]
+
+    @property
+    def count(self):
+        return len(self.state['ip'])
+
+    def pack(self, objects):
+        columns = o.pack(objects)
+        return {key: columns[key] for key in fields}
+
+    def gather(self):
+        organisms = self.queue.organisms
+        if organisms is not self.objects or len(organisms) < self.count:
+            self.objects = organisms
+            self.state = self.pack(organisms)
+        elif len(organisms) > self.count:
+            adopted = self.pack(organisms[self.count:])
+            self.state = {key: np.concatenate([self.state[key], adopted[key]]) for key in fields}
+
+    def store(self, rows=None):
+        if not self.is_dirty:
+            return
+        if rows is None:
+            self.is_dirty = False
+            rows = range(self.count)
+        s = self.state
+        for i in rows:
+            organism = self.objects[i]
+            organism.ip = s['ip'][i]
+            organism.delta = s['delta'][i]
+            organism.start = s['start'][i]
+            organism.size = s['size'][i]
+            organism.reg_values = s['regs'][i].ravel().tolist()
+            organism.frames = [tuple(frame) for frame in s['stack'][i, :s['depth'][i]].tolist()]
+            organism.errors = int(s['errors'][i])
+            organism.child_size = s['child_size'][i]
+            organism.child_start = s['child_start'][i]
+            organism.reproduction_cycle = int(s['reproduction_cycle'][i])
+            organism.children = int(s['children'][i])
+
+    def read(self, ys, xs):
+        max_y, max_x = c.config['memory_size']
+        inside = (ys >= 0) & (ys < max_y) & (xs >= 0) & (xs < max_x)
+        ops = np.full(ys.shape, blank)
+        ops[inside] = m.memory.memory_map[ys[inside], xs[inside]]
+        return ops
+
+    def read_ray(self, ip, delta, length):
+        k = np.arange(length)
+        return self.read(ip[:, :1] + k * delta[:, :1], ip[:, 1:] + k * delta[:, 1:])
+
+    def is_allocated(self, ip):
+        max_y, max_x = c.config['memory_size']
+        ys, xs = ip[:, 0], ip[:, 1]
+        inside = (ys >= 0) & (ys < max_y) & (xs >= 0) & (xs < max_x)
+        allocated = np.zeros(len(ip), dtype=bool)
+        allocated[inside] = m.memory.allocation_map[ys[inside], xs[inside]] != 0
+        return allocated
+
+    def cycle_all(self):
+        self.gather()
+        count = self.count
+        if count == 0:
+            return
+        self.next = {key: value.copy() for key, value in self.state.items()}
+        self.op = np.zeros(count, dtype=np.int64)
+        self.effects = np.zeros(count, dtype=np.int8)
+        self.reach = np.ones(count, dtype=np.int64)
+        self.extra = np.full((count, 2), -1, dtype=np.int64)
+        self.check = np.full((count, 2), -1, dtype=np.int64)
+        self.write = np.zeros((count, 3), dtype=np.int64)
+        self.dead = np.zeros(count, dtype=bool)
+        self.compute(np.arange(count))
+        pending = np.flatnonzero(self.effects)
+        position = 0
+        while position < len(pending):
+            j = pending[position]
+            position += 1
+            cells, regions = self.apply(j)
+            if not cells and not regions:
+                continue
+            hits = self.conflicts(j + 1, cells, regions)
+            if hits.size:
+                self.compute(hits)
+                pending = np.flatnonzero(self.effects[j + 1:]) + j + 1
+                position = 0
+        self.state = self.next
+        self.is_dirty = True
+        self.compact()
+
+    def compact(self):
+        dead = np.flatnonzero(self.dead)
+        if dead.size:
+            self.store(dead)
+            for j in dead:
+                self.queue.remove(self.objects[j])
+            self.queue.compact()
+            self.state = {key: value[~self.dead] for key, value in self.state.items()}
+        self.gather()
+
+    def compute(self, rows):
+        for key in fields:
+            self.next[key][rows] = self.state[key][rows]
+        n = self.next
+        ops = self.read_ray(n['ip'][rows], n['delta'][rows], 4)
+        b = Batch(
+            ops=ops,
+            ip=n['ip'][rows],
+            delta=n['delta'][rows],
+            size=n['size'][rows],
+            regs=n['regs'][rows],
+            stack=n['stack'][rows],
+            depth=n['depth'][rows],
+            child_size=n['child_size'][rows],
+            effects=np.zeros(len(rows), dtype=np.int8),
+            extra=np.full((len(rows), 2), -1, dtype=np.int64),
+            write=np.zeros((len(rows), 3), dtype=np.int64))
+        kinds = op_handlers[ops[:, 0]]
+        order = np.argsort(kinds, kind='stable')
+        bounds = np.searchsorted(kinds[order], np.arange(len(handlers) + 1))
+        for h, handler in enumerate(self.dispatch):
+            group = order[bounds[h]:bounds[h + 1]]
+            if handler is not None and group.size:
+                handler(b, group)
+        n['ip'][rows] = b.ip
+        n['delta'][rows] = b.delta
+        n['regs'][rows] = b.regs
+        n['stack'][rows] = b.stack
+        n['depth'][rows] = b.depth
+        self.op[rows] = ops[:, 0]
+        self.effects[rows] = b.effects
+        self.reach[rows] = op_reaches[ops[:, 0]]
+        self.extra[rows] = b.extra
+        self.check[rows] = -1
+        self.write[rows] = b.write
+        self.tail(rows[(b.effects & LIVE) == 0])
+
+    def tail(self, rows):
+        n = self.next
+        ip = n['ip'][rows]
+        self.check[rows] = ip
+        penalty = c.config['penalize_parasitism']
+        if penalty:
+            far = np.abs(ip - n['start'][rows]).max(axis=1) > penalty
+            n['errors'][rows] += far & ~self.is_allocated(ip)
+        n['reproduction_cycle'][rows] += 1
+        dead = ((n['errors'][rows] > c.config['organism_death_rate']) |
+                (n['reproduction_cycle'][rows] > c.config['kill_if_no_child']))
+        self.effects[rows[dead]] |= DEATH
+        new_ip = ip + n['delta'][rows]
+        inside = ((new_ip >= 0) & (new_ip < c.config['memory_size'])).all(axis=1) & ~dead
+        n['ip'][rows[inside]] = new_ip[inside]
+
+    def apply(self, j):
+        cells = []
+        regions = []
+        if self.effects[j] & LIVE:
+            if handlers[op_handlers[self.op[j]]] == 'allocate_child':
+                self.allocate_child(j, regions)
+            else:
+                self.split_child(j, regions)
+            self.tail(np.array([j]))
+        if self.effects[j] & WRITE:
+            y, x, value = self.write[j]
+            m.memory.write_inst(np.array([y, x]), value)
+            cells.append((y, x))
+        if self.effects[j] & DEATH:
+            self.kill(j, regions)
+        return cells, regions
+
+    def conflicts(self, after, cells, regions):
+        ip = self.state['ip'][after:]
+        delta = self.state['delta'][after:]
+        extra = self.extra[after:]
+        hit = np.zeros(len(ip), dtype=bool)
+        for y, x in cells:
+            dy = y - ip[:, 0]
+            dx = x - ip[:, 1]
+            along = dy * delta[:, 0] + dx * delta[:, 1]
+            across = dy * delta[:, 1] - dx * delta[:, 0]
+            hit |= (across == 0) & (along >= 0) & (along < self.reach[after:])
+            hit |= (extra[:, 0] == y) & (extra[:, 1] == x)
+        for start, size in regions:
+            check = self.check[after:]
+            hit |= ((check >= start) & (check < start + size)).all(axis=1)
+        return np.flatnonzero(hit) + after
+
+    def kill(self, j, regions):
+        n = self.next
+        self.queue.record_death(self.objects[j].organism_id,
+                                'errors' if n['errors'][j] > c.config['organism_death_rate'] else 'age')
+        m.memory.deallocate(n['start'][j], n['size'][j])
+        regions.append((n['start'][j].copy(), n['size'][j].copy()))
+        n['size'][j] = 0
+        if n['child_size'][j].any():
+            m.memory.deallocate(n['child_start'][j], n['child_size'][j])
+            regions.append((n['child_start'][j].copy(), n['child_size'][j].copy()))
+        n['child_size'][j] = 0
+        self.dead[j] = True
+
+    def move(self, b, g):
+        b.delta[g] = op_deltas[b.ops[g, 0]]
+
+    def find_template(self, b, g):
+        reg = op_regs[b.ops[g, 1]]
+        g, reg = g[reg >= 0], reg[reg >= 0]
+        if not g.size:
+            return
+        ray = self.read_ray(b.ip[g], b.delta[g], template_reach)
+        max_size = np.minimum(b.size[g].max(axis=1), template_reach)
+        k = np.arange(template_reach)
+        is_template = (ray == blank) | (ray == marker)
+        stops = (k >= 2) & (k < max_size[:, None]) & ~is_template
+        has_stop = stops.any(axis=1)
+        start = np.where(has_stop, stops.argmax(axis=1), max_size - 1)
+        length = np.maximum(np.where(has_stop, start - 2, max_size - 2), 0)
+        template = np.full(ray.shape, -1)
+        template[:, :-2] = np.where(ray[:, 2:] == blank, marker, blank)
+        rows = np.arange(len(g))
+        counter = np.zeros(len(g), dtype=np.int64)
+        found = np.full(len(g), -1)
+        active = length > 0
+        for t in range(template_reach):
+            i = start + t
+            current = np.flatnonzero(active & (found < 0) & (i < max_size))
+            if not current.size:
+                break
+            match = ray[current, i[current]] == template[current, counter[current]]
+            counter[current] = np.where(match, counter[current] + 1, 0)
+            done = current[counter[current] == length[current]]
+            found[done] = i[done]
+        done = rows[found >= 0]
+        b.regs[g[done], reg[done]] = b.ip[g[done]] + found[done, None] * b.delta[g[done]]
+
+    def if_not_zero(self, b, g):
+        mod = op_mods[b.ops[g, 1]]
+        is_modded = mod >= 0
+        reg = np.where(is_modded, op_regs[b.ops[g, 2]], op_regs[b.ops[g, 1]])
+        valid = reg >= 0
+        g, mod, is_modded, reg = g[valid], mod[valid], is_modded[valid], reg[valid]
+        values = b.regs[g, reg]
+        is_nonzero = np.where(is_modded, values[np.arange(len(g)), np.maximum(mod, 0)] != 0, values.any(axis=1))
+        b.ip[g] += (is_modded + 1 + is_nonzero)[:, None] * b.delta[g]
+
+    def add(self, b, g, amount):
+        mod = op_mods[b.ops[g, 1]]
+        is_modded = mod >= 0
+        reg = np.where(is_modded, op_regs[b.ops[g, 2]], op_regs[b.ops[g, 1]])
+        modded = is_modded & (reg >= 0)
+        plain = ~is_modded & (reg >= 0)
+        b.regs[g[modded], reg[modded], mod[modded]] += amount
+        b.regs[g[plain], reg[plain]] += amount
+
+    def increment(self, b, g):
+        self.add(b, g, 1)
+
+    def decrement(self, b, g):
+        self.add(b, g, -1)
+
+    def assign(self, b, g, value):
+        reg = op_regs[b.ops[g, 1]]
+        b.regs[g[reg >= 0], reg[reg >= 0]] = value
+
+    def zero(self, b, g):
+        self.assign(b, g, 0)
+
+    def one(self, b, g):
+        self.assign(b, g, 1)
+
+    def subtract(self, b, g):
+        reg1, reg2, reg3 = op_regs[b.ops[g, 1]], op_regs[b.ops[g, 2]], op_regs[b.ops[g, 3]]
+        valid = (reg1 >= 0) & (reg2 >= 0) & (reg3 >= 0)
+        g, reg1, reg2, reg3 = g[valid], reg1[valid], reg2[valid], reg3[valid]
+        b.regs[g, reg3] = b.regs[g, reg1] - b.regs[g, reg2]
+
+    def load_inst(self, b, g):
+        reg1, reg2 = op_regs[b.ops[g, 1]], op_regs[b.ops[g, 2]]
+        valid = (reg1 >= 0) & (reg2 >= 0)
+        g, reg1, reg2 = g[valid], reg1[valid], reg2[valid]
+        address = b.regs[g, reg1]
+        b.extra[g] = address
+        b.regs[g, reg2] = op_values[self.read(address[:, 0], address[:, 1])]
+
+    def write_inst(self, b, g):
+        reg1, reg2 = op_regs[b.ops[g, 1]], op_regs[b.ops[g, 2]]
+        valid = (reg1 >= 0) & (reg2 >= 0) & b.child_size[g].any(axis=1)
+        g, reg1, reg2 = g[valid], reg1[valid], reg2[valid]
+        b.effects[g] |= WRITE
+        b.write[g, :2] = b.regs[g, reg1]
+        b.write[g, 2] = b.regs[g, reg2, 0]
+
+    def push(self, b, g):
+        reg = op_regs[b.ops[g, 1]]
+        valid = (reg >= 0) & (b.depth[g] < c.config['stack_length'])
+        g, reg = g[valid], reg[valid]
+        b.stack[g, b.depth[g]] = b.regs[g, reg]
+        b.depth[g] += 1
+
+    def pop(self, b, g):
+        reg = op_regs[b.ops[g, 1]]
+        valid = (reg >= 0) & (b.depth[g] > 0)
+        g, reg = g[valid], reg[valid]
+        b.regs[g, reg] = b.stack[g, b.depth[g] - 1]
+        b.depth[g] -= 1
+
+    def live(self, b, g):
+        b.effects[g] |= LIVE
+
+    def allocate_child(self, j, regions):
+        n = self.next
+        ip, delta = n['ip'][j], n['delta'][j]
+        ops = self.read_ray(ip[None], delta[None], 3)[0]
+        reg1, reg2 = op_regs[ops[1]], op_regs[ops[2]]
+        if reg1 < 0 or reg2 < 0:
+            return
+        size = n['regs'][j, reg1].copy()
+        if (size <= 0).any():
+            return
+        max_search = min(max(c.config['memory_size']), 100)
+        for i in range(2, max_search):
+            test_pos = ip + i * delta
+            is_allocated_region = m.memory.is_allocated_region(test_pos, size)
+            if is_allocated_region is None:
+                break
+            if not is_allocated_region:
+                n['child_start'][j] = test_pos
+                n['regs'][j, reg2] = test_pos
+                n['child_size'][j] = size
+                m.memory.allocate(test_pos, size)
+                regions.append((test_pos, size))
+                break
+
+    def split_child(self, j, regions):
+        n = self.next
+        if n['child_size'][j].any():
+            child_start, child_size = n['child_start'][j].copy(), n['child_size'][j].copy()
+            m.memory.deallocate(child_start, child_size)
+            parent = self.objects[j]
+            parent.__class__(child_start, child_size, parent=parent.organism_id, parent_genome=parent.genome)
+            regions.append((child_start, child_size))
+            n['children'][j] += 1
+            n['reproduction_cycle'][j] = 0
+        n['child_size'][j] = 0
+        n['child_start'][j] = 0